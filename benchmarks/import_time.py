@@ -0,0 +1,71 @@
+"""Cold-start cost of `import notion_sdk_wrapper`.
+
+Every measurement runs in a fresh interpreter, so nothing is cached in `sys.modules`. The script exits with
+status 1 when the median import time exceeds `--max-ms`, or when the import eagerly loads a module that
+should stay lazy (httpx, asyncio, sqlite3), so it can guard the startup time in CI.
+
+    python benchmarks/import_time.py --runs 20 --max-ms 30
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Modules the bare package import must not load
+LAZY_MODULES = ["httpx", "asyncio", "sqlite3", "notion_sdk_wrapper.notion_client.client"]
+
+_MEASURE = """
+import json, sys, time
+start = time.perf_counter()
+import {module}
+{access}
+elapsed = time.perf_counter() - start
+print(json.dumps({{"ms": elapsed * 1000, "loaded": [name for name in {lazy!r} if name in sys.modules]}}))
+"""
+
+
+def measure(module: str, access: str = "", runs: int = 10):
+    code = _MEASURE.format(module=module, access=access, lazy=LAZY_MODULES)
+    timings = []
+    loaded = []
+    for _ in range(runs):
+        output = subprocess.run([sys.executable, "-c", code], cwd=ROOT, check=True, capture_output=True,
+                                text=True).stdout
+        result = json.loads(output)
+        timings.append(result["ms"])
+        loaded = result["loaded"]
+    return timings, loaded
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--max-ms", type=float, default=None,
+                        help="fail when the median time of the bare import exceeds this budget")
+    args = parser.parse_args()
+
+    cases = [
+        ("import notion_sdk_wrapper", "notion_sdk_wrapper", ""),
+        ("first use of NotionClient", "notion_sdk_wrapper", "notion_sdk_wrapper.NotionClient"),
+    ]
+    failed = False
+    for label, module, access in cases:
+        timings, loaded = measure(module, access, args.runs)
+        print("{:<28} median {:7.2f} ms  min {:7.2f} ms  max {:7.2f} ms".format(
+            label, statistics.median(timings), min(timings), max(timings)))
+        if not access:
+            if loaded:
+                print("  eagerly loaded: " + ", ".join(loaded))
+                failed = True
+            if args.max_ms is not None and statistics.median(timings) > args.max_ms:
+                print("  over the {} ms budget".format(args.max_ms))
+                failed = True
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""Speed of the JSON codecs on database query responses of 100 full pages.
+
+For every installed codec, the report gives the median time to decode a query response and to encode a request body
+creating a page, then the time per request of a client querying the local mock server (no latency) with it.
+
+    python benchmarks/json_codec.py --relation-size 25 --runs 50
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+import httpx
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from mock_server import MockNotion  # noqa: E402
+from notion_sdk_wrapper.notion_client import Client  # noqa: E402
+from notion_sdk_wrapper.notion_client.codec import CODECS, get_codec  # noqa: E402
+
+
+def median_ms(func, runs):
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--relation-size", type=int, default=10, help="related pages per row, to grow the payload")
+    parser.add_argument("--runs", type=int, default=30)
+    args = parser.parse_args()
+
+    server = MockNotion()
+    database_id = server.add_database(rows=100, relation_size=args.relation_size)
+    path = "databases/{}/query".format(database_id)
+    response = server.handle(httpx.Request("POST", "https://api.notion.com/v1/" + path, json={"page_size": 100}))
+    payload = response.content
+    page = response.json()["results"][0]
+    create_body = {"parent": page["parent"], "properties": page["properties"]}
+    print("query response of {:.0f} KB".format(len(payload) / 1024))
+
+    print("{:<10} {:>11} {:>9} {:>8} {:>11} {:>11}".format(
+        "codec", "decode ms", "MB/s", "speedup", "encode us", "request ms"))
+    baseline = None
+    for name in CODECS:
+        try:
+            codec = get_codec(name)
+        except ImportError:
+            print("{:<10} not installed".format(name))
+            continue
+        decode = median_ms(lambda: codec.loads(payload), args.runs)
+        encode = median_ms(lambda: codec.dumps(create_body), args.runs * 10)
+        client = Client(client=httpx.Client(transport=server.transport()), rate_limit=None, retry=None,
+                        json_codec=codec)
+        request = median_ms(lambda: client.request(path, "POST", body={"page_size": 100}), args.runs)
+        baseline = baseline or decode
+        print("{:<10} {:>11.3f} {:>9.1f} {:>7.1f}x {:>11.1f} {:>11.3f}".format(
+            name, decode, len(payload) / 1024 / 1024 / (decode / 1000), baseline / decode, encode * 1000, request))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""Per-request cost of the client logging on large database query responses.
+
+Each case sends queries of 100 pages to the local mock server (no latency) and reports the median time per request.
+`eager` reproduces the previous behaviour, which formatted the whole bodies whatever the log level; the other cases
+use the current client with the bodies logged at DEBUG to a null stream. Every case uses the same JSON codec and is
+warmed up first, then the cases run `--requests` queries per round, in a new random order every round.
+
+    python benchmarks/logging_overhead.py --requests 200 --rounds 5 --relation-size 25
+"""
+import argparse
+import logging
+import os
+import random
+import statistics
+import sys
+import time
+
+import httpx
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from mock_server import MockNotion  # noqa: E402
+from notion_sdk_wrapper.notion_client import Client  # noqa: E402
+
+
+class EagerLoggingClient(Client):
+    """Client formatting the bodies before the logger checks the level, as it used to."""
+
+    def _build_request(self, method, path, query=None, body=None, auth=None):
+        self.logger.info(f"{method} {self.client.base_url}{path}")
+        self.logger.debug(f"=> {query} -- {body}")
+        content = self.json_codec.dumps(body) if body is not None else None
+        return self.client.build_request(method, path, params=query, content=content,
+                                         headers={"Content-Type": "application/json"})
+
+    def _parse_response(self, response):
+        response.raise_for_status()
+        body = self.json_codec.loads(response.content)
+        self.logger.debug(f"=> {body}")
+        return body
+
+
+def _logger(name):
+    logger = logging.getLogger("logging_overhead." + name)
+    logger.propagate = False
+    logger.addHandler(logging.StreamHandler(open(os.devnull, "w")))
+    return logger
+
+
+CASES = [
+    ("eager, WARNING", EagerLoggingClient, {"log_level": logging.WARNING}),
+    ("lazy, WARNING", Client, {"log_level": logging.WARNING}),
+    ("lazy, INFO", Client, {"log_level": logging.INFO}),
+    ("lazy, DEBUG, 1000 chars", Client, {"log_level": logging.DEBUG}),
+    ("lazy, DEBUG, 10% sampled", Client, {"log_level": logging.DEBUG, "log_body_sample_rate": 0.1}),
+    ("lazy, DEBUG, whole bodies", Client, {"log_level": logging.DEBUG, "log_body_limit": None}),
+]
+
+
+def run(client, database_id, requests):
+    timings = []
+    for _ in range(requests):
+        start = time.perf_counter()
+        client.request("databases/{}/query".format(database_id), "POST", body={"page_size": 100})
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=100, help="requests per case and round")
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--warmup", type=int, default=10, help="untimed requests per case first")
+    parser.add_argument("--seed", type=int, default=None, help="seed of the case order")
+    parser.add_argument("--relation-size", type=int, default=25, help="related pages per row, to grow the payload")
+    args = parser.parse_args()
+
+    server = MockNotion()
+    database_id = server.add_database(rows=100, relation_size=args.relation_size)
+    payload = server.handle(httpx.Request("POST", "https://api.notion.com/v1/databases/{}/query".format(database_id),
+                                          json={"page_size": 100}))
+    print("response of {:.0f} KB per request".format(len(payload.content) / 1024))
+
+    clients = {}
+    for label, client_class, options in CASES:
+        clients[label] = client_class(client=httpx.Client(transport=server.transport()), rate_limit=None,
+                                      retry=None, logger=_logger(client_class.__name__), **options)
+        run(clients[label], database_id, args.warmup)
+
+    order = random.Random(args.seed)
+    timings = {label: [] for label in clients}
+    for _ in range(args.rounds):
+        labels = list(clients)
+        order.shuffle(labels)
+        for label in labels:
+            timings[label].extend(run(clients[label], database_id, args.requests))
+
+    baseline = statistics.median(timings[CASES[0][0]])
+    for label in clients:
+        median = statistics.median(timings[label])
+        print("{:<28} {:8.3f} ms/request  {:6.2f}x".format(label, median * 1000, median / baseline))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,269 @@
+"""In-process stand-in for the Notion API, served through an `httpx.MockTransport`.
+
+It emulates the endpoints used by the wrapper: pages, blocks and their children, database queries and page
+property items, all with cursor pagination, plus a configurable latency and rate limit (429) injection.
+Filters and sorts are accepted but ignored.
+
+    server = MockNotion(latency=0.05, rate_limit_ratio=0.01)
+    database_id = server.add_database(rows=1000)
+    notion_client = NotionClient("token", client=httpx.Client(transport=server.transport()), rate_limit=None)
+"""
+import asyncio
+import json
+import random
+import threading
+import time
+import uuid
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+
+import httpx
+
+MAX_PAGE_SIZE = 100
+
+
+def _new_id() -> str:
+    return str(uuid.uuid4())
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat(timespec="milliseconds").replace("+00:00", "Z")
+
+
+def _rich_text(text: str) -> List[Dict]:
+    return [{"type": "text", "text": {"content": text, "link": None}, "plain_text": text, "href": None,
+             "annotations": {"bold": False, "italic": False, "strikethrough": False, "underline": False,
+                             "code": False, "color": "default"}}]
+
+
+class MockNotion(object):
+    """Fake Notion workspace, see the module docstring.
+
+    `latency` seconds are waited before answering every request (`jitter` adds up to that much at random),
+    and a `rate_limit_ratio` fraction of the requests is answered with a 429 and `Retry-After: retry_after`.
+    """
+
+    def __init__(self, latency: float = 0.0, jitter: float = 0.0, rate_limit_ratio: float = 0.0,
+                 retry_after: float = 0.0, seed: Optional[int] = 0):
+        self.latency = latency
+        self.jitter = jitter
+        self.rate_limit_ratio = rate_limit_ratio
+        self.retry_after = retry_after
+        self.random = random.Random(seed)
+        self.pages: Dict[str, Dict] = {}
+        self.blocks: Dict[str, Dict] = {}
+        self.children: Dict[str, List[str]] = {}
+        self.databases: Dict[str, Dict] = {}
+        self.requests = 0
+        self.rate_limited = 0
+        self._lock = threading.Lock()
+
+    # Workspace content
+
+    def add_database(self, rows: int = 0, parent_id: Optional[str] = None, relation_size: int = 0) -> str:
+        """Create a database with `rows` pages and return its ID.
+
+        Every row has a title, a number, a select, a multi select and, with `relation_size`, a relation of
+        that many items (paginated by the property endpoint).
+        """
+        database_id = _new_id()
+        self.databases[database_id] = {
+            "object": "database", "id": database_id, "title": _rich_text("Database"),
+            "created_time": _now(), "last_edited_time": _now(),
+            "properties": {
+                "Name": {"id": "title", "name": "Name", "type": "title", "title": {}},
+                "Number": {"id": "num", "name": "Number", "type": "number", "number": {}},
+                "Status": {"id": "sel", "name": "Status", "type": "select", "select": {}},
+                "Tags": {"id": "tag", "name": "Tags", "type": "multi_select", "multi_select": {}},
+                "Related": {"id": "rel", "name": "Related", "type": "relation", "relation": {}},
+            },
+        }
+        if parent_id is not None:
+            self._add_child(parent_id, {"type": "child_database", "child_database": {"title": "Database"}},
+                            block_id=database_id)
+        for index in range(rows):
+            self.create_page({"database_id": database_id}, {
+                "Name": {"title": _rich_text("Row {}".format(index))},
+                "Number": {"number": index},
+                "Status": {"select": {"name": ("Todo", "Doing", "Done")[index % 3]}},
+                "Tags": {"multi_select": [{"name": "tag{}".format(index % 5)}]},
+                "Related": {"relation": [{"id": _new_id()} for _ in range(relation_size)]},
+            })
+        return database_id
+
+    def add_page_tree(self, depth: int = 2, breadth: int = 5, blocks_per_page: int = 10,
+                      parent_id: Optional[str] = None, databases_per_page: int = 0,
+                      rows_per_database: int = 10) -> str:
+        """Create a page with `blocks_per_page` paragraphs and `breadth` child pages, `depth` levels deep.
+
+        Every page also gets `databases_per_page` child databases of `rows_per_database` rows.
+        """
+        page_id = self.create_page({"page_id": parent_id} if parent_id else {"workspace": True}, {
+            "title": {"title": _rich_text("Page")},
+        })["id"]
+        for index in range(blocks_per_page):
+            self._add_child(page_id, {"type": "paragraph",
+                                      "paragraph": {"rich_text": _rich_text("Paragraph {}".format(index))}})
+        for _ in range(databases_per_page):
+            self.add_database(rows=rows_per_database, parent_id=page_id)
+        if depth > 0:
+            for _ in range(breadth):
+                self.add_page_tree(depth - 1, breadth, blocks_per_page, parent_id=page_id,
+                                   databases_per_page=databases_per_page, rows_per_database=rows_per_database)
+        return page_id
+
+    def create_page(self, parent: Dict, properties: Dict) -> Dict:
+        page_id = _new_id()
+        page = {
+            "object": "page", "id": page_id, "parent": parent, "archived": False,
+            "created_time": _now(), "last_edited_time": _now(), "url": "https://www.notion.so/" + page_id,
+            "properties": {},
+        }
+        schema = self.databases[parent["database_id"]]["properties"] if "database_id" in parent else {}
+        for name, value in properties.items():
+            name, property_type, value = self._property_value(schema, name, value)
+            property_id = schema[name]["id"] if name in schema else name
+            page["properties"][name] = {"id": property_id, "type": property_type, property_type: value}
+        self.pages[page_id] = page
+        title = next((value["title"] for value in page["properties"].values() if value["type"] == "title"), [])
+        block = {"type": "child_page", "child_page": {"title": "".join(item["plain_text"] for item in title)}}
+        if "database_id" in parent:
+            self.blocks[page_id] = dict(block, object="block", id=page_id, has_children=False, archived=False,
+                                        created_time=page["created_time"], last_edited_time=page["last_edited_time"])
+        else:
+            self._add_child(parent.get("page_id"), block, block_id=page_id)
+        return page
+
+    @staticmethod
+    def _property_value(properties: Dict, name: str, value) -> tuple:
+        """Return `(name, type, value)` of a property sent as `{type: value}` or as a bare title list.
+
+        The bare list is the `{"title": [...]}` shorthand sent by `Page.set_title`. Raises `ValueError` for
+        malformed values.
+        """
+        if isinstance(value, list):
+            name = next((key for key, prop in properties.items() if prop["type"] == "title"), name)
+            return name, "title", value
+        if not isinstance(value, dict):
+            raise ValueError("Invalid value of property {}".format(name))
+        property_type = next((key for key in value if key not in ("id", "type")), None)
+        if property_type is None:
+            raise ValueError("Missing value of property {}".format(name))
+        return name, property_type, value[property_type]
+
+    def _add_child(self, parent_id: Optional[str], block: Dict, block_id: Optional[str] = None) -> Dict:
+        block = dict(block, object="block", id=block_id or _new_id(), has_children=False, archived=False,
+                     created_time=_now(), last_edited_time=_now())
+        self.blocks[block["id"]] = block
+        if parent_id is not None:
+            self.children.setdefault(parent_id, []).append(block["id"])
+            if parent_id in self.blocks:
+                self.blocks[parent_id]["has_children"] = True
+        return block
+
+    # HTTP
+
+    def transport(self) -> httpx.MockTransport:
+        """Transport for `httpx.Client`, latency is waited with `time.sleep`."""
+        def handler(request):
+            delay = self._delay()
+            if delay:
+                time.sleep(delay)
+            return self.handle(request)
+
+        return httpx.MockTransport(handler)
+
+    def async_transport(self) -> httpx.MockTransport:
+        """Transport for `httpx.AsyncClient`, latency is waited with `asyncio.sleep`."""
+        async def handler(request):
+            delay = self._delay()
+            if delay:
+                await asyncio.sleep(delay)
+            return self.handle(request)
+
+        return httpx.MockTransport(handler)
+
+    def _delay(self) -> float:
+        return self.latency + (self.random.uniform(0, self.jitter) if self.jitter else 0.0)
+
+    def handle(self, request: httpx.Request) -> httpx.Response:
+        with self._lock:
+            self.requests += 1
+            if self.rate_limit_ratio and self.random.random() < self.rate_limit_ratio:
+                self.rate_limited += 1
+                return self._error(429, "rate_limited", "Rate limited", {"Retry-After": str(self.retry_after)})
+            try:
+                return self._route(request)
+            except KeyError as e:
+                return self._error(404, "object_not_found", "Could not find {}".format(e))
+            except (ValueError, TypeError, AttributeError) as e:
+                # Malformed body, e.g. a property value of the wrong shape
+                return self._error(400, "validation_error", str(e))
+
+    def _route(self, request: httpx.Request) -> httpx.Response:
+        parts = request.url.path.strip("/").split("/")[1:]
+        body = json.loads(request.content) if request.content else {}
+        params = dict(request.url.params)
+        method = request.method
+        if parts[0] == "databases" and len(parts) == 3 and method == "POST":
+            rows = [page for page in self.pages.values() if page["parent"].get("database_id") == parts[1]]
+            return self._list(rows, body)
+        if parts[0] == "databases" and len(parts) == 2:
+            return httpx.Response(200, json=self.databases[parts[1]])
+        if parts[0] == "pages" and len(parts) == 1 and method == "POST":
+            if body["parent"].get("database_id") not in self.databases and "page_id" not in body["parent"]:
+                return self._error(400, "validation_error", "Invalid parent")
+            return httpx.Response(200, json=self.create_page(body["parent"], body.get("properties", {})))
+        if parts[0] == "pages" and len(parts) == 4:
+            return self._property_item(self.pages[parts[1]], parts[3], params)
+        if parts[0] == "pages" and len(parts) == 2:
+            page = self.pages[parts[1]]
+            if method == "PATCH":
+                for name, value in body.get("properties", {}).items():
+                    name, property_type, value = self._property_value(page["properties"], name, value)
+                    page["properties"].setdefault(name, {"id": name, "type": property_type})[property_type] = value
+                if "archived" in body:
+                    page["archived"] = body["archived"]
+                page["last_edited_time"] = _now()
+            return httpx.Response(200, json=page)
+        if parts[0] == "blocks" and len(parts) == 3:
+            if method == "PATCH":
+                created = [self._add_child(parts[1], child) for child in body["children"]]
+                return httpx.Response(200, json={"object": "list", "results": created, "has_more": False,
+                                                 "next_cursor": None})
+            children = [self.blocks[block_id] for block_id in self.children.get(parts[1], [])]
+            return self._list(children, params)
+        if parts[0] == "blocks" and len(parts) == 2:
+            block = self.blocks[parts[1]]
+            if method == "PATCH":
+                block.update(body)
+                block["last_edited_time"] = _now()
+            return httpx.Response(200, json=block)
+        if parts[0] == "users" and parts[-1] == "me":
+            return httpx.Response(200, json={"object": "user", "id": "bot", "type": "bot"})
+        return self._error(400, "invalid_request_url", "Invalid request URL")
+
+    def _property_item(self, page: Dict, property_id: str, params: Dict) -> httpx.Response:
+        value = next(value for value in page["properties"].values() if value["id"] == property_id)
+        property_type = value["type"]
+        if property_type not in ("title", "rich_text", "relation", "people"):
+            return httpx.Response(200, json=dict(value, object="property_item"))
+        items = [{"object": "property_item", "id": property_id, "type": property_type, property_type: item}
+                 for item in value[property_type]]
+        res = self._list(items, params).json()
+        res.update(type="property_item", property_item={"id": property_id, "type": property_type, property_type: {}})
+        return httpx.Response(200, json=res)
+
+    @staticmethod
+    def _list(items: List[Dict], params: Dict) -> httpx.Response:
+        start = int(params.get("start_cursor") or 0)
+        page_size = min(int(params.get("page_size") or MAX_PAGE_SIZE), MAX_PAGE_SIZE)
+        end = start + page_size
+        has_more = end < len(items)
+        return httpx.Response(200, json={"object": "list", "results": items[start:end], "has_more": has_more,
+                                         "next_cursor": str(end) if has_more else None})
+
+    @staticmethod
+    def _error(status: int, code: str, message: str, headers: Optional[Dict] = None) -> httpx.Response:
+        return httpx.Response(status, json={"object": "error", "status": status, "code": code, "message": message},
+                              headers=headers)
@@ -0,0 +1,169 @@
+"""Throughput and latency of the wrapper against the local mock server, for `Client` and `AsyncClient`.
+
+Each scenario is repeated `--repeat` times; the report gives the items processed per second and the
+percentiles of the per-request latency seen by the HTTP client (retries of rate limited requests included).
+
+    python benchmarks/throughput.py --latency 0.02 --rate-limit-ratio 0.01
+    python benchmarks/throughput.py --scenarios query_all crawl --json results.json
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import statistics
+import sys
+import time
+
+import httpx
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from mock_server import MockNotion  # noqa: E402
+from notion_sdk_wrapper import AsyncNotionClient, NotionClient  # noqa: E402
+from notion_sdk_wrapper.concurrency import gather_concurrently  # noqa: E402
+from notion_sdk_wrapper.notion_property import NumberProperty, TitleProperty  # noqa: E402
+
+SCENARIOS = ["query_all", "children", "bulk_create", "crawl"]
+
+
+class LatencyRecorder(object):
+    """httpx event hooks recording the latency of every request."""
+
+    def __init__(self):
+        self.latencies = []
+
+    def on_request(self, request):
+        request.extensions["benchmark_start"] = time.perf_counter()
+
+    def on_response(self, response):
+        self.latencies.append(time.perf_counter() - response.request.extensions["benchmark_start"])
+
+    async def on_request_async(self, request):
+        self.on_request(request)
+
+    async def on_response_async(self, response):
+        self.on_response(response)
+
+    def sync_hooks(self):
+        return {"request": [self.on_request], "response": [self.on_response]}
+
+    def async_hooks(self):
+        return {"request": [self.on_request_async], "response": [self.on_response_async]}
+
+
+def percentile(values, q):
+    if not values:
+        return float("nan")
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(q / 100 * (len(values) - 1))))]
+
+
+def _client_options():
+    # The rate limiter would dominate the timings, retries of injected 429 are still exercised
+    return {"rate_limit": None, "identity_map_size": 0, "log_level": logging.ERROR}
+
+
+def _rows(count):
+    return [{"Name": TitleProperty.template(text="New {}".format(index)),
+             "Number": NumberProperty.template(number=index)} for index in range(count)]
+
+
+def run_sync(server, scenario, args, recorder):
+    client = httpx.Client(transport=server.transport(), event_hooks=recorder.sync_hooks(),
+                          limits=httpx.Limits(max_connections=args.workers))
+    notion = NotionClient("token", client=client, **_client_options())
+    if scenario == "query_all":
+        return len(notion.retrieve_database(args.database_id).query_all())
+    if scenario == "children":
+        return len(notion.retrieve_page(args.page_id).children())
+    if scenario == "bulk_create":
+        job = notion.retrieve_database(args.database_id).add_pages(_rows(args.create), max_workers=args.workers)
+        return len(job.run())
+    if scenario == "crawl":
+        return len(list(notion.crawl(args.tree_id, max_workers=args.workers)))
+    raise ValueError(scenario)
+
+
+async def run_async(server, scenario, args, recorder):
+    client = httpx.AsyncClient(transport=server.async_transport(), event_hooks=recorder.async_hooks(),
+                               limits=httpx.Limits(max_connections=args.workers))
+    async with AsyncNotionClient("token", client=client, **_client_options()) as notion:
+        if scenario == "query_all":
+            return len(await notion.retrieve_database(args.database_id).query_all())
+        if scenario == "children":
+            return len(await notion.retrieve_page(args.page_id).children())
+        if scenario == "bulk_create":
+            database = notion.retrieve_database(args.database_id)
+            return len(await gather_concurrently(database.add_page, _rows(args.create), args.workers))
+        if scenario == "crawl":
+            return len([result async for result in await notion.crawl(args.tree_id, max_concurrency=args.workers)])
+    raise ValueError(scenario)
+
+
+def benchmark(server, scenario, mode, args):
+    recorder = LatencyRecorder()
+    durations = []
+    items = 0
+    requests = server.requests
+    for _ in range(args.repeat):
+        start = time.perf_counter()
+        if mode == "sync":
+            items += run_sync(server, scenario, args, recorder)
+        else:
+            items += asyncio.run(run_async(server, scenario, args, recorder))
+        durations.append(time.perf_counter() - start)
+    total = sum(durations)
+    latencies = [latency * 1000 for latency in recorder.latencies]
+    return {
+        "scenario": scenario,
+        "client": mode,
+        "items_per_s": items / total,
+        "requests_per_s": (server.requests - requests) / total,
+        "run_ms": statistics.median(durations) * 1000,
+        "p50_ms": percentile(latencies, 50),
+        "p95_ms": percentile(latencies, 95),
+        "p99_ms": percentile(latencies, 99),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scenarios", nargs="+", choices=SCENARIOS, default=SCENARIOS)
+    parser.add_argument("--clients", nargs="+", choices=["sync", "async"], default=["sync", "async"])
+    parser.add_argument("--latency", type=float, default=0.01, help="server latency per request, in seconds")
+    parser.add_argument("--jitter", type=float, default=0.005)
+    parser.add_argument("--rate-limit-ratio", type=float, default=0.0, help="fraction of requests answered by 429")
+    parser.add_argument("--rows", type=int, default=1000, help="rows of the queried database")
+    parser.add_argument("--blocks", type=int, default=500, help="child blocks of the listed page")
+    parser.add_argument("--create", type=int, default=200, help="pages created by bulk_create")
+    parser.add_argument("--depth", type=int, default=2, help="depth of the crawled tree")
+    parser.add_argument("--breadth", type=int, default=5, help="child pages per page of the crawled tree")
+    parser.add_argument("--databases", type=int, default=1, help="child databases per page of the crawled tree")
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--json", help="also write the results to this file")
+    args = parser.parse_args()
+
+    server = MockNotion(latency=args.latency, jitter=args.jitter, rate_limit_ratio=args.rate_limit_ratio)
+    args.database_id = server.add_database(rows=args.rows)
+    args.page_id = server.add_page_tree(depth=0, blocks_per_page=args.blocks)
+    args.tree_id = server.add_page_tree(depth=args.depth, breadth=args.breadth, databases_per_page=args.databases)
+
+    print("{:<12} {:<6} {:>10} {:>10} {:>10} {:>9} {:>9} {:>9}".format(
+        "scenario", "client", "items/s", "req/s", "run ms", "p50 ms", "p95 ms", "p99 ms"))
+    results = []
+    for scenario in args.scenarios:
+        for mode in args.clients:
+            result = benchmark(server, scenario, mode, args)
+            results.append(result)
+            print("{scenario:<12} {client:<6} {items_per_s:>10.1f} {requests_per_s:>10.1f} {run_ms:>10.1f} "
+                  "{p50_ms:>9.2f} {p95_ms:>9.2f} {p99_ms:>9.2f}".format(**result))
+    print("{} requests, {} rate limited".format(server.requests, server.rate_limited))
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,60 @@
-from .notion_wrapper import NotionClient
-from .notion_database import Database
-from .notion_blocks import *
-from .rich_text import RichText
-from .notion_property import *
+"""Object wrapper of the Notion API.
 
+Names are imported from their submodule on first access (PEP 562), so `import notion_sdk_wrapper` does not
+pay for httpx, asyncio or sqlite3 until the objects needing them are used.
+"""
+import importlib
+from typing import TYPE_CHECKING
+
+_EXPORTS = {
+    ".notion_wrapper": ["NotionClient", "AsyncNotionClient"],
+    ".notion_database": ["Database"],
+    ".notion_blocks": ["Block", "PageBlock", "Page", "TextBlock", "FileBlock", "DatabaseBlock", "AppendChildrenError",
+                       "chunk_children", "MAX_CHILDREN_PER_REQUEST", "MAX_BLOCKS_PER_REQUEST"],
+    ".notion_async": ["AsyncBlock", "AsyncPageBlock", "AsyncPage", "AsyncTextBlock", "AsyncFileBlock",
+                      "AsyncDatabaseBlock", "AsyncDatabase"],
+    ".notion_bulk": ["BulkJob", "Checkpoint"],
+    ".notion_crawler": ["Crawler", "AsyncCrawler", "CrawlResult"],
+    ".rich_text": ["RichText"],
+    ".notion_filter": ["Filter", "PropertyFilter", "TimestampFilter", "CompoundFilter", "And", "Or", "Sort"],
+    ".notion_sync": ["Watermark"],
+    ".notion_replica": ["Replica"],
+    ".notion_property": ["guess_property_type", "decode_property_value", "property_from_page", "is_truncated",
+                         "BaseProperty", "PropertyItem", "TitleProperty", "RichTextProperty", "NumberProperty",
+                         "SelectProperty", "TagsProperty"],
+}
+
+_MODULES = {name: module for module, names in _EXPORTS.items() for name in names}
+
+__all__ = list(_MODULES)
+
+
+def __getattr__(name):
+    module = _MODULES.get(name)
+    if module is None:
+        raise AttributeError("module {!r} has no attribute {!r}".format(__name__, name))
+    value = getattr(importlib.import_module(module, __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
+
+
+if TYPE_CHECKING:
+    from .notion_wrapper import NotionClient, AsyncNotionClient
+    from .notion_database import Database
+    from .notion_blocks import (Block, PageBlock, Page, TextBlock, FileBlock, DatabaseBlock, AppendChildrenError,
+                                chunk_children, MAX_CHILDREN_PER_REQUEST, MAX_BLOCKS_PER_REQUEST)
+    from .notion_async import (AsyncBlock, AsyncPageBlock, AsyncPage, AsyncTextBlock, AsyncFileBlock, AsyncDatabaseBlock,
+                               AsyncDatabase)
+    from .notion_bulk import BulkJob, Checkpoint
+    from .notion_crawler import Crawler, AsyncCrawler, CrawlResult
+    from .rich_text import RichText
+    from .notion_filter import Filter, PropertyFilter, TimestampFilter, CompoundFilter, And, Or, Sort
+    from .notion_sync import Watermark
+    from .notion_replica import Replica
+    from .notion_property import (guess_property_type, decode_property_value, property_from_page, is_truncated,
+                                  BaseProperty, PropertyItem, TitleProperty, RichTextProperty, NumberProperty,
+                                  SelectProperty, TagsProperty)
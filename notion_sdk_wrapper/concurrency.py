@@ -0,0 +1,82 @@
+import asyncio
+import contextvars
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Iterable, Iterator, List, Optional
+
+DEFAULT_CONCURRENCY = 8
+
+
+def submit(executor: ThreadPoolExecutor, func: Callable[..., Any], *args) -> Future:
+    """Submit `func(*args)` to run in a copy of the current context.
+
+    Worker threads otherwise start from an empty context, and would lose context variables
+    such as the active tracing span.
+    """
+    return executor.submit(contextvars.copy_context().run, func, *args)
+
+
+def map_concurrently(func: Callable[[Any], Any], items: Iterable, max_workers: int = DEFAULT_CONCURRENCY) -> List:
+    """Call `func` on every item with a bounded thread pool.
+
+    Results are returned in input order. An item whose call raised holds the exception instance
+    instead of a result, so one failure never discards the rest of the batch.
+    """
+    items = list(items)
+    if not items:
+        return []
+
+    def call(item):
+        try:
+            return func(item)
+        except Exception as e:
+            return e
+
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(items)))) as executor:
+        return [future.result() for future in [submit(executor, call, item) for item in items]]
+
+
+async def gather_concurrently(func: Callable[[Any], Awaitable[Any]], items: Iterable,
+                              limit: int = DEFAULT_CONCURRENCY) -> List:
+    """Await `func` on every item with at most `limit` coroutines in flight.
+
+    Same contract as `map_concurrently`: input order is kept and failures are returned in place.
+    """
+    semaphore = asyncio.Semaphore(max(1, limit))
+
+    async def call(item):
+        async with semaphore:
+            return await func(item)
+
+    return list(await asyncio.gather(*(call(item) for item in items), return_exceptions=True))
+
+
+def prefetch_pages(fetch: Callable[[Optional[str]], Dict], start_cursor: Optional[str] = None) -> Iterator[Dict]:
+    """Iterate over a paginated endpoint, one response per page.
+
+    `fetch(start_cursor)` must return a paginated response. The next page is requested in a
+    background thread as soon as the current cursor is known, so the network round-trip overlaps
+    with the consumer processing the current page.
+    """
+    executor = ThreadPoolExecutor(max_workers=1)
+    try:
+        future = submit(executor, fetch, start_cursor)
+        while future is not None:
+            res = future.result()
+            future = submit(executor, fetch, res["next_cursor"]) if res["has_more"] else None
+            yield res
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+async def aprefetch_pages(fetch: Callable[[Optional[str]], Awaitable[Dict]],
+                          start_cursor: Optional[str] = None) -> AsyncIterator[Dict]:
+    """Asynchronous version of `prefetch_pages`, the next page is fetched by a background task."""
+    task = asyncio.ensure_future(fetch(start_cursor))
+    try:
+        while task is not None:
+            res = await task
+            task = asyncio.ensure_future(fetch(res["next_cursor"])) if res["has_more"] else None
+            yield res
+    finally:
+        if task is not None and not task.done():
+            task.cancel()
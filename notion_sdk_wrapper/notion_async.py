@@ -0,0 +1,523 @@
+from contextlib import asynccontextmanager
+from pprint import pformat
+from typing import TYPE_CHECKING, Dict, List
+
+from .concurrency import DEFAULT_CONCURRENCY, aprefetch_pages, gather_concurrently
+from .notion_blocks import AppendChildrenError, Block, FileBlock, chunk_children, pending_children
+from .notion_identity import invalidate, wrap
+from .notion_filter import Filter, Sort, build_filter, build_sorts
+from .notion_sync import Watermark, async_sync_pages
+from .rich_text import RichText
+from .notion_property import (PropertyItem, RichTextProperty, TitleProperty, guess_property_type, is_truncated,
+                              property_from_page)
+
+if TYPE_CHECKING:
+    from .notion_client import AsyncClient
+
+
+class AsyncBlock(object):
+    """Awaitable mirror of `Block` built on top of `notion_client.AsyncClient`.
+
+    Lazy attributes such as `block_res` return coroutines, so they have to be awaited:
+    `res = await block.block_res`.
+    """
+
+    def __init__(self, client: "AsyncClient", block_id: str, block_res=None):
+        self._block_res = block_res
+        self._children = None
+        self.client = client
+        self.block_id = block_id
+
+    def __repr__(self):
+        return "AsyncBlock(" + pformat({"id": self.block_id}) + ")"
+
+    @property
+    def type(self):
+        return self._get_type()
+
+    async def _get_type(self):
+        return (await self.block_res)["type"]
+
+    @property
+    def block_res(self):
+        return self._retrieve_block_res()
+
+    async def _retrieve_block_res(self):
+        if getattr(self, "_block_res", None) is None:
+            self._block_res = await self.client.blocks.retrieve(
+                self.block_id, last_edited_time=self._known_last_edited_time())
+        return self._block_res
+
+    def _refresh(self, block_res=None):
+        if block_res is not None:
+            self._block_res = block_res
+            if getattr(self, "_rich_text", None) is not None:
+                self._rich_text = None
+
+    def _invalidate_others(self):
+        invalidate(self.client, self.block_id, keep=self)
+
+    def _known_last_edited_time(self):
+        return (getattr(self, "_block_res", None) or {}).get("last_edited_time")
+
+    @staticmethod
+    def guess_block_type(block_res: Dict):
+        _BLOCK_TYPES_ = {
+            "paragraph": AsyncTextBlock,
+            "heading_1": AsyncTextBlock,
+            "heading_2": AsyncTextBlock,
+            "heading_3": AsyncTextBlock,
+            "file": AsyncFileBlock,
+            "child_page": AsyncPageBlock,
+            "child_database": AsyncDatabaseBlock,
+        }
+        block_type = block_res["type"]
+        if block_type in _BLOCK_TYPES_:
+            return _BLOCK_TYPES_[block_type]
+        else:
+            return AsyncBlock
+
+    def _wrap_block(self, block_res: Dict):
+        type_block = self.guess_block_type(block_res)
+        return wrap(type_block, self.client, block_res["id"], block_res=block_res)
+
+    async def iter_children(self, page_size: int = 100):
+        """Asynchronous version of `Block.iter_children`."""
+        # Lets a persistent response cache serve the listing if the parent has not changed
+        last_edited_time = self._known_last_edited_time()
+
+        def fetch(start_cursor):
+            return self.client.blocks.children.list(self.block_id, start_cursor=start_cursor, page_size=page_size,
+                                                    last_edited_time=last_edited_time)
+
+        async for res in aprefetch_pages(fetch):
+            for children_block_res in res["results"]:
+                yield self._wrap_block(children_block_res)
+
+    async def children(self, page_size: int = 100):
+        if getattr(self, "_children", None) is None:
+            self._children = [child async for child in self.iter_children(page_size)]
+        return self._children
+
+    async def append_children(self, type="paragraph", children: List[Dict] = None, **kwargs):
+        """Asynchronous version of `Block.append_children`."""
+        if children is None:
+            # Templates are plain dicts, so the synchronous block classes are reused to build them
+            children_type = Block.guess_block_type({"type": type})
+            children = [children_type.template(type=type, **kwargs)]
+
+        appended = []
+        try:
+            for offset, chunk, overflows in chunk_children(children):
+                try:
+                    _children_res = await self.client.blocks.children.append(self.block_id, children=chunk)
+                except Exception as e:
+                    raise AppendChildrenError(appended, children[offset:]) from e
+                created = [self._wrap_block(children_block_res) for children_block_res in _children_res["results"]]
+                appended.extend(created)
+                nested = list(zip(created, overflows))
+                for index, (block, overflow) in enumerate(nested):
+                    if overflow:
+                        try:
+                            await block.append_children(children=overflow)
+                        except AppendChildrenError as e:
+                            raise AppendChildrenError(appended, children[offset + len(chunk):],
+                                                      pending_children(block, e, nested[index + 1:])) from e
+        finally:
+            if getattr(self, "_children", None) is not None:
+                self._children.extend(appended)
+        return appended
+
+    async def archive(self):
+        data = {
+            "archived": True
+        }
+        res = await self.client.blocks.update(block_id=self.block_id, **data)
+        self._block_res = res
+        self._invalidate_others()
+        return self
+
+
+class AsyncPageBlock(AsyncBlock):
+    def __init__(self, client: "AsyncClient", block_id: str, block_res=None):
+        super().__init__(client, block_id, block_res)
+
+    @property
+    def title(self):
+        return self._get_title()
+
+    async def _get_title(self):
+        return (await self.block_res)["child_page"]["title"]
+
+    def as_page(self):
+        return wrap(AsyncPage, self.client, self.block_id, block_res=self._block_res)
+
+    def __repr__(self):
+        return "AsyncPageBlock(" + pformat({"id": self.block_id}) + ")"
+
+
+class AsyncPage(AsyncPageBlock):
+    def __init__(self, client: "AsyncClient", block_id: str, block_res=None, page_res=None):
+        super().__init__(client, block_id, block_res)
+        self._properties = None
+        self.page_id = block_id
+        self._page_res = page_res
+        self._staged_properties = {}
+        self._batch_depth = 0
+
+    def as_block(self):
+        return wrap(AsyncPageBlock, self.client, self.page_id, block_res=self._block_res)
+
+    def _refresh(self, block_res=None, page_res=None):
+        super()._refresh(block_res)
+        if page_res is not None:
+            self._page_res = page_res
+            self._properties = None
+
+    def _known_last_edited_time(self):
+        return (getattr(self, "_page_res", None) or {}).get("last_edited_time") or super()._known_last_edited_time()
+
+    @property
+    def page_res(self):
+        return self._retrieve_page_res()
+
+    async def _retrieve_page_res(self):
+        if getattr(self, "_page_res", None) is None:
+            self._page_res = await self.client.pages.retrieve(
+                self.page_id, last_edited_time=self._known_last_edited_time())
+        return self._page_res
+
+    @property
+    def properties(self):
+        return self._get_properties()
+
+    async def _get_properties(self):
+        if getattr(self, "_properties", None) is None:
+            properties = (await self.page_res)["properties"]
+            name_list = list(properties.keys())
+            id_list = [properties[name]["id"] for name in name_list]
+            self._properties = dict(zip(name_list, id_list))
+        return self._properties
+
+    async def retrieve_properties(self, name: str, force_refresh: bool = False):
+        properties = await self.properties
+        assert name in properties.keys(), "Property {} not found, available names are {}".format(name,
+                                                                                                 properties.keys())
+        page_property = (await self.page_res)["properties"][name]
+        if not force_refresh and not is_truncated(page_property):
+            return property_from_page(page_property)
+        last_edited_time = self._known_last_edited_time()
+        res = await self.client.pages.properties.retrieve(self.page_id, properties[name],
+                                                         last_edited_time=last_edited_time)
+        property_type = guess_property_type(res)
+        if property_type is PropertyItem:
+            # Items cannot be fetched lazily from synchronous indexing, so every page is loaded here
+            results = list(res["results"])
+            next_res = res
+            while next_res.get("has_more"):
+                next_res = await self.client.pages.properties.retrieve(
+                    self.page_id, properties[name], start_cursor=next_res["next_cursor"],
+                    last_edited_time=last_edited_time)
+                results.extend(next_res["results"])
+            res = dict(res, results=results, has_more=False, next_cursor=None)
+        return property_type(res)
+
+    async def retrieve_all_properties(self, names: List[str] = None, force_refresh: bool = False,
+                                      max_concurrency: int = DEFAULT_CONCURRENCY) -> Dict:
+        """Asynchronous version of `Page.retrieve_all_properties`."""
+        names = list(await self.properties) if names is None else names
+        results = await gather_concurrently(lambda name: self.retrieve_properties(name, force_refresh),
+                                            names, max_concurrency)
+        return dict(zip(names, results))
+
+    def __repr__(self):
+        return "AsyncPage(" + pformat({"id": self.page_id}) + ")"
+
+    async def archive(self):
+        res = await self.client.pages.update(page_id=self.page_id, archived=True)
+        self._page_res = res
+        self._invalidate_others()
+
+    async def set_title(self, title: str, bold=False, italic=False, strikethrough=False, underline=False, code=False,
+                        color="default"):
+        properties = TitleProperty.template(text=title, bold=bold, italic=italic, strikethrough=strikethrough,
+                                            underline=underline, code=code, color=color)
+        await self._update_properties(properties)
+
+    async def set_property(self, name: str, property):
+        await self._update_properties({name: property})
+
+    async def _update_properties(self, properties: Dict):
+        self._staged_properties.update(properties)
+        if self._batch_depth == 0:
+            await self.flush()
+
+    def stage_property(self, name: str, property):
+        self._staged_properties[name] = property
+
+    @property
+    def staged_properties(self):
+        return dict(self._staged_properties)
+
+    async def flush(self, keep_on_error: bool = False):
+        """Asynchronous version of `Page.flush`."""
+        if self._staged_properties:
+            properties, self._staged_properties = self._staged_properties, {}
+            try:
+                res = await self.client.pages.update(page_id=self.page_id, properties=properties)
+            except Exception:
+                if keep_on_error:
+                    self._staged_properties = dict(properties, **self._staged_properties)
+                raise
+            self._page_res = res
+            self._invalidate_others()
+        return self
+
+    @asynccontextmanager
+    async def batch(self):
+        """Asynchronous version of `Page.batch`, use with `async with`."""
+        self._batch_depth += 1
+        try:
+            yield self
+        except BaseException:
+            if self._batch_depth == 1:
+                self._staged_properties = {}
+            raise
+        finally:
+            self._batch_depth -= 1
+        if self._batch_depth == 0:
+            await self.flush()
+
+
+class AsyncTextBlock(AsyncBlock):
+    def __init__(self, client: "AsyncClient", block_id: str, block_res=None):
+        super().__init__(client, block_id, block_res)
+        self._rich_text = None
+
+    @property
+    def plain_text(self):
+        return self._get_plain_text()
+
+    async def _get_plain_text(self):
+        return (await self.rich_text).plain_text
+
+    @property
+    def rich_text(self):
+        return self._get_rich_text()
+
+    async def _get_rich_text(self):
+        if getattr(self, "_rich_text", None) is None:
+            block_res = await self.block_res
+            self._rich_text = RichText(block_res[block_res["type"]]["rich_text"])
+        return self._rich_text
+
+    def __repr__(self):
+        return "AsyncTextBlock(" + pformat({"id": self.block_id}) + ")"
+
+    async def set_plain_text(self, text: str, bold=False, italic=False, strikethrough=False, underline=False,
+                             code=False, color="default"):
+        block_type = await self.type
+        data = {
+            block_type: RichTextProperty.template(text=text, bold=bold, italic=italic, strikethrough=strikethrough,
+                                                  underline=underline, code=code, color=color)
+        }
+        res = await self.client.blocks.update(block_id=self.block_id, **data)
+        self._rich_text = RichText(res[block_type]["rich_text"])
+        self._block_res = res
+        self._invalidate_others()
+        return self
+
+    async def set_rich_text(self, rich_text: RichText):
+        return await self._update_rich_text(rich_text.res)
+
+    async def add_rich_text(self, rich_text: RichText):
+        current = await self.rich_text
+        current.add_rich_text(rich_text)
+        await self._update_rich_text(current.res)
+
+    async def _update_rich_text(self, rich_text_res: List[Dict]):
+        block_type = await self.type
+        res = await self.client.blocks.update(block_id=self.block_id, **{block_type: {"rich_text": rich_text_res}})
+        self._rich_text = RichText(res[block_type]["rich_text"])
+        self._block_res = res
+        self._invalidate_others()
+        return self
+
+
+class AsyncFileBlock(AsyncBlock):
+    def __init__(self, client: "AsyncClient", block_id: str, block_res=None):
+        super().__init__(client, block_id, block_res)
+
+    @property
+    def file_url(self):
+        return self._get_file_url()
+
+    async def _get_file_url(self):
+        return (await self.block_res)["file"]["external"]["url"]
+
+    template = staticmethod(FileBlock.template)
+
+    def __repr__(self):
+        return "AsyncFileBlock(" + pformat({"id": self.block_id}) + ")"
+
+
+class AsyncDatabaseBlock(AsyncBlock):
+    def __init__(self, client: "AsyncClient", block_id: str, block_res=None):
+        super().__init__(client, block_id, block_res)
+
+    @property
+    def title(self):
+        return self._get_title()
+
+    async def _get_title(self):
+        return (await self.block_res)["child_database"]["title"]
+
+    def as_database(self):
+        return wrap(AsyncDatabase, self.client, self.block_id, block_res=self._block_res)
+
+    def __repr__(self):
+        return "AsyncDatabaseBlock(" + pformat({"id": self.block_id}) + ")"
+
+
+class AsyncDatabase(AsyncBlock):
+    def __init__(self, client: "AsyncClient", block_id: str, block_res=None):
+        super().__init__(client, block_id, block_res)
+        self.database_id = block_id
+        self._database_res = None
+        self._properties = None
+        self._property_types = None
+
+    def _refresh(self, block_res=None, database_res=None):
+        super()._refresh(block_res)
+        if database_res is not None:
+            self._database_res = database_res
+            self._properties = None
+            self._property_types = None
+
+    def _known_last_edited_time(self):
+        return ((getattr(self, "_database_res", None) or {}).get("last_edited_time")
+                or super()._known_last_edited_time())
+
+    @property
+    def database_res(self):
+        return self._retrieve_database_res()
+
+    async def _retrieve_database_res(self):
+        if getattr(self, "_database_res", None) is None:
+            self._database_res = await self.client.databases.retrieve(
+                self.database_id, last_edited_time=self._known_last_edited_time())
+        return self._database_res
+
+    @property
+    def title(self):
+        return self._get_title()
+
+    async def _get_title(self):
+        return RichText((await self.database_res)["title"]).plain_text
+
+    @property
+    def properties(self):
+        return self._get_properties()
+
+    async def _get_properties(self):
+        if getattr(self, "_properties", None) is None:
+            properties = (await self.database_res)["properties"]
+            name_list = list(properties.keys())
+            id_list = [properties[name]["id"] for name in name_list]
+            self._properties = dict(zip(name_list, id_list))
+        return self._properties
+
+    @property
+    def property_types(self):
+        return self._get_property_types()
+
+    async def _get_property_types(self):
+        if getattr(self, "_property_types", None) is None:
+            properties = (await self.database_res)["properties"]
+            self._property_types = {name: properties[name]["type"] for name in properties}
+        return self._property_types
+
+    async def _build_query(self, filter=None, sorts=None):
+        property_types = None
+        if isinstance(filter, Filter) or any(isinstance(sort, Sort) for sort in (sorts or [])):
+            property_types = await self.property_types
+        return build_filter(filter, property_types), build_sorts(sorts, property_types)
+
+    def __repr__(self):
+        return "AsyncDatabase(" + pformat({"id": self.database_id}) + ")"
+
+    async def query(self, filter=None, start_cursor: str = None, sorts=None, page_size: int = 100, filters=None):
+        filter, sorts = await self._build_query(filter if filter is not None else filters, sorts)
+        data = {
+            "filter": filter,
+            "sorts": sorts,
+            "start_cursor": start_cursor,
+            "page_size": page_size
+        }
+        res = await self.client.databases.query(self.database_id, **data)
+
+        results = res["results"]
+        has_more = res["has_more"]
+        next_cursor = res["next_cursor"]
+
+        return results, has_more, next_cursor
+
+    async def query_all(self, filter=None, sorts=None, filters=None):
+        filter, sorts = await self._build_query(filter if filter is not None else filters, sorts)
+
+        results = []
+        has_more = True
+        start_cursor = None
+        while has_more:
+            cur_res, has_more, start_cursor = await self.query(filter, start_cursor, sorts)
+            results.extend(cur_res)
+        return results
+
+    async def iter_query(self, filter=None, sorts=None, page_size: int = 100):
+        """Asynchronous version of `Database.iter_query`."""
+        filter, sorts = await self._build_query(filter, sorts)
+
+        def fetch(start_cursor):
+            return self.client.databases.query(self.database_id, filter=filter, sorts=sorts,
+                                               start_cursor=start_cursor, page_size=page_size)
+
+        async for res in aprefetch_pages(fetch):
+            for page_res in res["results"]:
+                yield wrap(AsyncPage, self.client, page_res["id"], page_res=page_res)
+
+    async def children(self, filter=None, sorts=None, filters=None):
+        filter = filter if filter is not None else filters
+        if filter or sorts:
+            return [wrap(AsyncPage, self.client, res["id"], page_res=res)
+                    for res in await self.query_all(filter, sorts)]
+        if getattr(self, "_children", None) is None:
+            _children_res = await self.query_all()
+            self._children = []
+            for children_page_res in _children_res:
+                children_page_id = children_page_res["id"]
+                self._children.append(wrap(AsyncPage, self.client, children_page_id, page_res=children_page_res))
+        return self._children
+
+    async def add_page(self, properties: Dict):
+        data = {
+            "parent": {
+                "database_id": self.database_id
+            },
+            "properties": properties
+        }
+        res = await self.client.pages.create(**data)
+        return wrap(AsyncPage, self.client, res["id"], page_res=res)
+
+    def sync(self, since: str = None, watermark=None, page_size: int = 100):
+        """Asynchronous version of `Database.sync`, iterate over the result with `async for`."""
+        if not isinstance(watermark, Watermark):
+            watermark = Watermark(watermark)
+        return async_sync_pages(self, watermark, since=since, page_size=page_size)
+
+    async def flush_pages(self, pages: List[AsyncPage], max_concurrency: int = DEFAULT_CONCURRENCY) -> List:
+        """Send the staged property updates of many pages concurrently.
+
+        Return the flushed pages in input order, a page whose update failed is returned as the exception.
+        """
+        pages = [page for page in pages if page.staged_properties]
+        return await gather_concurrently(AsyncPage.flush, pages, max_concurrency)
@@ -1,10 +1,16 @@
-import time
+from contextlib import contextmanager
 from pprint import pformat
-from typing import Dict
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Tuple
 
-import notion_client
-from rich_text import RichText
-from notion_property import *
+from .concurrency import DEFAULT_CONCURRENCY, map_concurrently, prefetch_pages
+from .notion_client.tracing import traced
+from .notion_identity import invalidate, wrap
+from .rich_text import RichText
+from .notion_property import (PropertyItem, RichTextProperty, TitleProperty, guess_property_type, is_truncated,
+                              property_from_page)
+
+if TYPE_CHECKING:
+    from .notion_client import Client
 
 _BLOCK_TYPES = {
     "paragraph", "heading_1", "heading_2", "heading_3", "bulleted_list_item", "numbered_list_item", "to_do", "toggle",
@@ -13,9 +19,105 @@ _BLOCK_TYPES = {
     "link_to_page", "table", "table_row", "unsupported"
 }
 
+# Limits of the append block children endpoint
+MAX_CHILDREN_PER_REQUEST = 100
+MAX_BLOCKS_PER_REQUEST = 1000
+
+
+class AppendChildrenError(Exception):
+    """Raised when appending children stopped part way.
+
+    Chunks are appended in order and appending stops at the first failure, so `appended` holds the
+    blocks created before the failure and `remaining` the templates that still have to be appended.
+    `pending` lists the nested children that were not appended to blocks already created, as
+    `(block, templates)` pairs to append with `block.append_children(children=templates)` before
+    `remaining`. The original exception is chained as `__cause__`.
+    """
+
+    def __init__(self, appended: List, remaining: List[Dict],
+                 pending: Optional[List[Tuple[Any, List[Dict]]]] = None):
+        pending = pending or []
+        super().__init__("Appended {} blocks, {} blocks remaining, {} blocks with pending children".format(
+            len(appended), len(remaining), len(pending)))
+        self.appended = appended
+        self.remaining = remaining
+        self.pending = pending
+
+
+def pending_children(block, error: AppendChildrenError, later: List[Tuple[Any, List[Dict]]]):
+    """Return the nested work left when appending the overflow of `block` failed with `error`.
+
+    That is what `block` and its descendants still miss, then the overflows of the `later` blocks of
+    the same chunk, which were not attempted.
+    """
+    pending = [(block, error.remaining)] if error.remaining else []
+    return pending + error.pending + [(other, overflow) for other, overflow in later if overflow]
+
+
+def _nested_children(template: Dict) -> List[Dict]:
+    content = template.get(template.get("type"))
+    return content.get("children") or [] if isinstance(content, dict) else []
+
+
+def _fits_inline(child: Dict):
+    # A nested child is sent with its own children if they are within the limits; a request carries
+    # two levels of nesting at most, so the grandchildren cannot have children of their own
+    grandchildren = _nested_children(child)
+    return len(grandchildren) <= MAX_CHILDREN_PER_REQUEST and not any(map(_nested_children, grandchildren))
+
+
+def _split_nested_children(template: Dict):
+    """Return a copy of `template` keeping the nested children the API accepts inline, and the overflow.
+
+    The nested children are kept in order until one of them does not fit in the request, that one
+    and the following are the overflow. Appended to the created block afterwards, the overflow is
+    split again, so descendants at any depth end up in follow-up requests.
+    """
+    nested = _nested_children(template)
+    inline, total = 0, 1
+    for child in nested[:MAX_CHILDREN_PER_REQUEST]:
+        size = _count_blocks(child)
+        if not _fits_inline(child) or total + size > MAX_BLOCKS_PER_REQUEST:
+            break
+        inline, total = inline + 1, total + size
+    if inline == len(nested):
+        return template, []
+    block_type = template["type"]
+    content = dict(template[block_type])
+    if inline:
+        content["children"] = nested[:inline]
+    else:
+        del content["children"]
+    return dict(template, **{block_type: content}), nested[inline:]
+
+
+def _count_blocks(template: Dict):
+    return 1 + sum(_count_blocks(child) for child in _nested_children(template))
+
+
+def chunk_children(templates: List[Dict]):
+    """Split block templates into request-sized chunks, preserving order.
+
+    Yields `(offset, chunk, overflows)`: `offset` is the index of the first template of the chunk in
+    `templates`, and `overflows[i]` the nested children of `chunk[i]` that do not fit in the request,
+    to be appended to the created block afterwards.
+    """
+    offset, chunk, overflows, total = 0, [], [], 0
+    for template in templates:
+        template, overflow = _split_nested_children(template)
+        size = _count_blocks(template)
+        if chunk and (len(chunk) == MAX_CHILDREN_PER_REQUEST or total + size > MAX_BLOCKS_PER_REQUEST):
+            yield offset, chunk, overflows
+            offset, chunk, overflows, total = offset + len(chunk), [], [], 0
+        chunk.append(template)
+        overflows.append(overflow)
+        total += size
+    if chunk:
+        yield offset, chunk, overflows
+
 
 class Block(object):
-    def __init__(self, client: notion_client.client.Client, block_id: str, block_res=None):
+    def __init__(self, client: "Client", block_id: str, block_res=None):
         self._block_res = block_res
         self._children = None
         self.client = client
@@ -29,11 +131,28 @@ class Block(object):
         return self.block_res["type"]
 
     @property
+    @traced("Block.block_res")
     def block_res(self):
         if getattr(self, "_block_res", None) is None:
-            self._block_res = self.client.blocks.retrieve(self.block_id)
+            self._block_res = self.client.blocks.retrieve(
+                self.block_id, last_edited_time=self._known_last_edited_time())
         return self._block_res
 
+    def _refresh(self, block_res=None):
+        # Called by the identity map when a fresher response is listed for an object it already holds
+        if block_res is not None:
+            self._block_res = block_res
+            if getattr(self, "_rich_text", None) is not None:
+                self._rich_text = None
+
+    def _invalidate_others(self):
+        # Other objects of the same ID (e.g. the `PageBlock` of a `Page`) hold a stale response now
+        invalidate(self.client, self.block_id, keep=self)
+
+    def _known_last_edited_time(self):
+        # `last_edited_time` of the object if it is already loaded, never sends a request
+        return (getattr(self, "_block_res", None) or {}).get("last_edited_time")
+
     @staticmethod
     def guess_block_type(block_res: Dict):
         _BLOCK_TYPES_ = {
@@ -51,33 +170,77 @@ class Block(object):
         else:
             return Block
 
-    def children(self):
-        if getattr(self, "_children", None) is None:
-            _children_res = self.client.blocks.children.list(self.block_id)
-            self._children = []
-            for children_block_res in _children_res["results"]:
+    @traced("Block.iter_children")
+    def iter_children(self, page_size: int = 100):
+        """Yield every child block, following `next_cursor` until the last page.
+
+        The next page of children is prefetched in the background while the current one is consumed.
+        """
+        # Lets a persistent response cache serve the listing if the parent has not changed
+        last_edited_time = self._known_last_edited_time()
+
+        def fetch(start_cursor):
+            return self.client.blocks.children.list(self.block_id, start_cursor=start_cursor, page_size=page_size,
+                                                    last_edited_time=last_edited_time)
+
+        for res in prefetch_pages(fetch):
+            for children_block_res in res["results"]:
                 children_block_id = children_block_res["id"]
                 type_block = self.guess_block_type(children_block_res)
-                self._children.append(type_block(self.client, block_id=children_block_id, block_res=children_block_res))
-        return self._children
+                yield wrap(type_block, self.client, children_block_id, block_res=children_block_res)
 
-    def append_children(self, type="paragraph", **kwargs):
-        children_type = self.guess_block_type({"type": type})
-        data = {"children": [children_type.template(**kwargs)]}
-        _children_res = self.client.blocks.children.append(self.block_id, **data)
-        self._children = []
-        for children_block_res in _children_res["results"]:
-            children_block_id = children_block_res["id"]
-            type_block = self.guess_block_type(children_block_res)
-            self._children.append(type_block(self.client, block_id=children_block_id, block_res=children_block_res))
+    @traced("Block.children")
+    def children(self, page_size: int = 100):
+        if getattr(self, "_children", None) is None:
+            self._children = list(self.iter_children(page_size))
         return self._children
 
+    @traced("Block.append_children")
+    def append_children(self, type="paragraph", children: List[Dict] = None, **kwargs):
+        """Append blocks and return the created ones.
+
+        Either a single block built from `type` and the template arguments in `kwargs`, or every
+        template in `children`. Templates are sent in chunks of at most 100 blocks, in order, and
+        the created blocks are added to the cached children. Raise `AppendChildrenError` if a chunk fails.
+        """
+        if children is None:
+            children_type = self.guess_block_type({"type": type})
+            children = [children_type.template(type=type, **kwargs)]
+
+        appended = []
+        try:
+            for offset, chunk, overflows in chunk_children(children):
+                try:
+                    _children_res = self.client.blocks.children.append(self.block_id, children=chunk)
+                except Exception as e:
+                    raise AppendChildrenError(appended, children[offset:]) from e
+                created = []
+                for children_block_res in _children_res["results"]:
+                    children_block_id = children_block_res["id"]
+                    type_block = self.guess_block_type(children_block_res)
+                    created.append(wrap(type_block, self.client, children_block_id, block_res=children_block_res))
+                appended.extend(created)
+                nested = list(zip(created, overflows))
+                for index, (block, overflow) in enumerate(nested):
+                    if overflow:
+                        try:
+                            block.append_children(children=overflow)
+                        except AppendChildrenError as e:
+                            raise AppendChildrenError(appended, children[offset + len(chunk):],
+                                                      pending_children(block, e, nested[index + 1:])) from e
+        finally:
+            if getattr(self, "_children", None) is not None:
+                self._children.extend(appended)
+        return appended
+
+    @traced("Block.archive")
     def archive(self):
         data = {
             "archived": True
         }
         res = self.client.blocks.update(block_id=self.block_id, **data)
         self._block_res = res
+        self._invalidate_others()
         return self
 
     @staticmethod
@@ -94,7 +257,7 @@ class PageBlock(Block):
         return self.block_res["child_page"]["title"]
 
     def as_page(self):
-        return Page(self.client, self.block_id)
+        return wrap(Page, self.client, self.block_id, block_res=self._block_res)
 
     def __repr__(self):
         return "PageBlock(" + pformat({"id": self.block_id, "title": self.title}) + ")"
@@ -106,14 +269,27 @@ class Page(PageBlock):
         self._properties = None
         self.page_id = block_id
         self._page_res = page_res
+        self._staged_properties = {}
+        self._batch_depth = 0
 
     def as_block(self):
-        return PageBlock(self.client, self.page_id)
+        return wrap(PageBlock, self.client, self.page_id, block_res=self._block_res)
+
+    def _refresh(self, block_res=None, page_res=None):
+        super()._refresh(block_res)
+        if page_res is not None:
+            self._page_res = page_res
+            self._properties = None
+
+    def _known_last_edited_time(self):
+        return (getattr(self, "_page_res", None) or {}).get("last_edited_time") or super()._known_last_edited_time()
 
     @property
+    @traced("Page.page_res")
     def page_res(self):
         if getattr(self, "_page_res", None) is None:
-            self._page_res = self.client.pages.retrieve(self.page_id)
+            self._page_res = self.client.pages.retrieve(
+                self.page_id, last_edited_time=self._known_last_edited_time())
         return self._page_res
 
     @property
@@ -125,49 +301,117 @@ class Page(PageBlock):
             self._properties = dict(zip(name_list, id_list))
         return self._properties
 
-    def retrieve_properties(self, name: str):
+    @traced("Page.retrieve_properties")
+    def retrieve_properties(self, name: str, force_refresh: bool = False, eager: bool = False):
+        """Return the property object of `name`.
+
+        The value is decoded from `page_res` when it holds the complete value. Relations, people and
+        text with 25 items or more, and rollups, are read from the property endpoint instead, as are all
+        properties with `force_refresh=True`. Their items are fetched page by page as they are accessed,
+        or all at once with `eager=True`.
+        """
         assert name in self.properties.keys(), "Property {} not found, available names are {}".format(name,
                                                                                                       self.properties.keys())
+        page_property = self.page_res["properties"][name]
+        if not force_refresh and not is_truncated(page_property):
+            return property_from_page(page_property)
+        property_id = self.properties[name]
+        last_edited_time = self._known_last_edited_time()
 
-        def retry():
-            try:
-                return self.client.pages.properties.retrieve(self.page_id, self.properties[name])
-            except Exception as e:
-                if str(e).startswith("429"):
-                    print("Retrying query...")
-                    time.sleep(1)
-                    return retry()
-                else:
-                    raise e
-
-        res = retry()
+        def fetch(start_cursor=None):
+            return self.client.pages.properties.retrieve(self.page_id, property_id, start_cursor=start_cursor,
+                                                         last_edited_time=last_edited_time)
+
+        res = fetch()
         property_type = guess_property_type(res)
+        if property_type is PropertyItem:
+            item = PropertyItem(res, fetch)
+            return item.load() if eager else item
         return property_type(res)
 
+    @traced("Page.retrieve_all_properties")
+    def retrieve_all_properties(self, names: List[str] = None, force_refresh: bool = False,
+                                max_workers: int = DEFAULT_CONCURRENCY) -> Dict:
+        """Return `{name: property}` for `names` (all properties by default), each fully loaded.
+
+        Properties needing the property endpoint are retrieved concurrently, one worker per property
+        (the pages of a single property are sequential). A property that failed holds the exception.
+        """
+        names = list(self.properties) if names is None else names
+        results = map_concurrently(lambda name: self.retrieve_properties(name, force_refresh, eager=True),
+                                   names, max_workers)
+        return dict(zip(names, results))
+
     def __repr__(self):
         return "Page(" + pformat({"id": self.page_id}) + ")"
 
+    @traced("Page.archive")
     def archive(self):
         res = self.client.pages.update(page_id=self.page_id, archived=True)
         self._page_res = res
+        self._invalidate_others()
 
     def set_title(self, title: str, bold=False, italic=False, strikethrough=False, underline=False, code=False,
                   color="default"):
-        data = {
-            "properties": TitleProperty.template(text=title, bold=bold, italic=italic, strikethrough=strikethrough,
-                                                 underline=underline, code=code, color=color)
-        }
-        res = self.client.pages.update(page_id=self.page_id, **data)
-        self._page_res = res
+        properties = TitleProperty.template(text=title, bold=bold, italic=italic, strikethrough=strikethrough,
+                                            underline=underline, code=code, color=color)
+        self._update_properties(properties)
 
     def set_property(self, name: str, property):
-        data = {
-            "properties": {
-                name: property
-            }
-        }
-        res = self.client.pages.update(page_id=self.page_id, **data)
-        self._page_res = res
+        self._update_properties({name: property})
+
+    def _update_properties(self, properties: Dict):
+        # Inside `batch()` the update is staged and sent with the others when the batch ends
+        self._staged_properties.update(properties)
+        if self._batch_depth == 0:
+            self.flush()
+
+    def stage_property(self, name: str, property):
+        """Stage a property update, to be sent with every other staged update by `flush`."""
+        self._staged_properties[name] = property
+
+    @property
+    def staged_properties(self):
+        return dict(self._staged_properties)
+
+    @traced("Page.flush")
+    def flush(self, keep_on_error: bool = False):
+        """Send every staged property update in a single `pages.update` request.
+
+        The updates are unstaged before the request is sent, so a rejected value is not sent again with
+        later updates. With `keep_on_error=True` they are staged again if the request fails, to retry them.
+        """
+        if self._staged_properties:
+            properties, self._staged_properties = self._staged_properties, {}
+            try:
+                res = self.client.pages.update(page_id=self.page_id, properties=properties)
+            except Exception:
+                if keep_on_error:
+                    # Updates staged since then win over the failed ones
+                    self._staged_properties = dict(properties, **self._staged_properties)
+                raise
+            self._page_res = res
+            self._invalidate_others()
+        return self
+
+    @contextmanager
+    def batch(self):
+        """Coalesce `set_title` / `set_property` calls made in the block into one request.
+
+        The staged updates are sent when the outermost `batch()` exits, and discarded if it exits
+        with an exception.
+        """
+        self._batch_depth += 1
+        try:
+            yield self
+        except BaseException:
+            if self._batch_depth == 1:
+                self._staged_properties = {}
+            raise
+        finally:
+            self._batch_depth -= 1
+        if self._batch_depth == 0:
+            self.flush()
 
 
 class TextBlock(Block):
@@ -191,6 +435,7 @@ class TextBlock(Block):
                                        "id": self.block_id,
                                        "plain_text": self.plain_text}) + ")"
 
+    @traced("TextBlock.set_plain_text")
     def set_plain_text(self, text: str, bold=False, italic=False, strikethrough=False, underline=False, code=False,
                        color="default"):
         data = {
@@ -201,37 +446,44 @@ class TextBlock(Block):
         res = self.client.blocks.update(block_id=self.block_id, **data)
         self._rich_text = RichText(res[self.type]["rich_text"])
         self._block_res = res
+        self._invalidate_others()
         return self
 
+    @traced("TextBlock.set_rich_text")
     def set_rich_text(self, rich_text: RichText):
         data = {
-            "paragraph": {
+            self.type: {
                 "rich_text": rich_text.res}
         }
         res = self.client.blocks.update(block_id=self.block_id, **data)
         self._rich_text = RichText(res[self.type]["rich_text"])
         self._block_res = res
+        self._invalidate_others()
         return self
 
+    @traced("TextBlock.add_rich_text")
     def add_rich_text(self, rich_text: RichText):
         self.rich_text.add_rich_text(rich_text)
         data = {
-            "paragraph": {
+            self.type: {
                 "rich_text": self.rich_text.res}
         }
         res = self.client.blocks.update(block_id=self.block_id, **data)
         self._rich_text = RichText(res[self.type]["rich_text"])
         self._block_res = res
+        self._invalidate_others()
 
     @staticmethod
     def template(type="paragraph", text="", bold=False, italic=False, strikethrough=False, underline=False,
-                 code=False, color="default", **kwargs):
+                 code=False, color="default", children: List[Dict] = None, **kwargs):
         data = {
             "object": "block",
             "type": type,
             type: RichTextProperty.template(text=text, bold=bold, italic=italic, strikethrough=strikethrough,
                                             underline=underline, code=code, color=color)
         }
+        if children:
+            data[type]["children"] = children
         return data
 
 
@@ -270,7 +522,9 @@ class DatabaseBlock(Block):
         return self.block_res["child_database"]["title"]
 
     def as_database(self):
-        raise NotImplementedError
+        # Imported here, `Database` is itself a `Block` subclass defined in notion_database
+        from .notion_database import Database
+        return wrap(Database, self.client, self.block_id, block_res=self._block_res)
 
     def __repr__(self):
         return "DatabaseBlock(" + pformat({"id": self.block_id, "title": self.title}) + ")"
@@ -0,0 +1,121 @@
+import json
+import os
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, Iterable, Optional, Tuple, Union
+
+from .concurrency import DEFAULT_CONCURRENCY, submit
+
+
+class Checkpoint(object):
+    """Append-only record of the rows a bulk job has completed, so an interrupted job can resume.
+
+    Every completed row is written as one JSON line `{"key": ..., "id": ...}` and flushed right away;
+    rows whose key is already recorded are skipped when the job is run again.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.done = {}
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                for line in f:
+                    line = line.strip()
+                    if not line:
+                        continue
+                    try:
+                        entry = json.loads(line)
+                    except json.JSONDecodeError:
+                        # A line truncated by an interruption, the row will simply be redone
+                        continue
+                    self.done[entry["key"]] = entry.get("id")
+
+    def __contains__(self, key):
+        return str(key) in self.done
+
+    def __len__(self):
+        return len(self.done)
+
+    def add(self, key, object_id: Optional[str] = None):
+        key = str(key)
+        self.done[key] = object_id
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(json.dumps({"key": key, "id": object_id}) + "\n")
+
+
+class BulkJob(object):
+    """Run `func` over keyed items with a bounded thread pool.
+
+    Iterating the job runs it and yields results in completion order. A failing item does not abort the
+    batch: its exception is stored in `failures` under the item key. Items are pulled lazily from the
+    input, so at most a few items per worker are held in memory.
+    """
+
+    def __init__(self, func: Callable[[Any], Any], items: Iterable[Tuple[Any, Any]],
+                 max_workers: int = DEFAULT_CONCURRENCY, checkpoint: Union[str, Checkpoint, None] = None,
+                 on_progress: Optional[Callable[["BulkJob"], None]] = None):
+        self.func = func
+        self.items = items
+        self.max_workers = max(1, max_workers)
+        if isinstance(checkpoint, str):
+            checkpoint = Checkpoint(checkpoint)
+        self.checkpoint = checkpoint
+        self.on_progress = on_progress
+        self.completed = 0
+        self.skipped = 0
+        self.failures: Dict[Any, Exception] = {}
+
+    def __iter__(self):
+        items = iter(self.items)
+        executor = ThreadPoolExecutor(max_workers=self.max_workers)
+        running = {}
+        try:
+            exhausted = False
+            while not exhausted or running:
+                while not exhausted and len(running) < 2 * self.max_workers:
+                    try:
+                        key, item = next(items)
+                    except StopIteration:
+                        exhausted = True
+                        break
+                    if self.checkpoint is not None and key in self.checkpoint:
+                        self.skipped += 1
+                        continue
+                    running[submit(executor, self.func, item)] = key
+                if not running:
+                    continue
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    succeeded, result = self._record(running.pop(future), future)
+                    if succeeded:
+                        yield result
+                    if self.on_progress is not None:
+                        self.on_progress(self)
+        finally:
+            # Only the items not started yet are dropped when the job stops early: the ones in flight
+            # may create objects, so they are waited for and checkpointed to not be redone on resume
+            for future in list(running):
+                if future.cancel():
+                    del running[future]
+            for future in wait(running).done:
+                self._record(running.pop(future), future)
+            executor.shutdown(wait=False)
+
+    def _record(self, key, future):
+        """Store the outcome of a finished item and return `(succeeded, result)`."""
+        try:
+            result = future.result()
+        except Exception as e:
+            self.failures[key] = e
+            return False, None
+        self.completed += 1
+        if self.checkpoint is not None:
+            self.checkpoint.add(key, getattr(result, "block_id", None))
+        return True, result
+
+    def run(self):
+        """Run the whole job and return the results."""
+        return list(self)
+
+    def __repr__(self):
+        return "BulkJob(completed={}, failed={}, skipped={})".format(self.completed, len(self.failures),
+                                                                     self.skipped)
@@ -6,7 +6,54 @@ creating powerful workflows.
 For more information visit https://github.com/ramnes/notion-sdk-py.
 """
 
-from .client import AsyncClient, Client
-from .errors import APIErrorCode, APIResponseError
+import importlib
+from typing import TYPE_CHECKING, Any, List
 
-__all__ = ["AsyncClient", "Client", "APIErrorCode", "APIResponseError"]
+# The clients pull in httpx, so every name is imported on first access (PEP 562)
+_MODULES = {
+    "AsyncClient": ".client",
+    "Client": ".client",
+    "APIErrorCode": ".errors",
+    "APIResponseError": ".errors",
+    "TokenBucket": ".rate_limit",
+    "RetryPolicy": ".retry",
+    "ResponseCache": ".cache",
+    "ClientHooks": ".hooks",
+    "MetricsCollector": ".hooks",
+    "JSONCodec": ".codec",
+}
+
+if TYPE_CHECKING:
+    from .cache import ResponseCache
+    from .client import AsyncClient, Client
+    from .codec import JSONCodec
+    from .errors import APIErrorCode, APIResponseError
+    from .hooks import ClientHooks, MetricsCollector
+    from .rate_limit import TokenBucket
+    from .retry import RetryPolicy
+
+__all__ = [
+    "AsyncClient",
+    "Client",
+    "APIErrorCode",
+    "APIResponseError",
+    "TokenBucket",
+    "RetryPolicy",
+    "ResponseCache",
+    "ClientHooks",
+    "MetricsCollector",
+    "JSONCodec",
+]
+
+
+def __getattr__(name: str) -> Any:
+    module = _MODULES.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module, __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> List[str]:
+    return sorted(set(globals()) | set(__all__))
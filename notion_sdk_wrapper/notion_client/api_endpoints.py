@@ -2,11 +2,11 @@
 
 from typing import TYPE_CHECKING, Any
 
-from notion_client.helpers import pick
-from notion_client.typing import SyncAsync
+from .helpers import pick
+from .typing import SyncAsync
 
 if TYPE_CHECKING:
-    from notion_client.client import BaseClient
+    from .client import BaseClient
 
 
 class Endpoint:
@@ -37,6 +37,7 @@ class BlocksChildrenEndpoint(Endpoint):
             method="GET",
             query=pick(kwargs, "start_cursor", "page_size"),
             auth=kwargs.get("auth"),
+            cache_validator=kwargs.get("last_edited_time"),
         )
 
 
@@ -51,7 +52,10 @@ class BlocksEndpoint(Endpoint):
         *[🔗 Endpoint documentation](https://developers.notion.com/reference/retrieve-a-block)*
         """  # noqa: E501
         return self.parent.request(
-            path=f"blocks/{block_id}", method="GET", auth=kwargs.get("auth")
+            path=f"blocks/{block_id}",
+            method="GET",
+            auth=kwargs.get("auth"),
+            cache_validator=kwargs.get("last_edited_time"),
         )
 
     def update(self, block_id: str, **kwargs: Any) -> SyncAsync[Any]:
@@ -142,7 +146,10 @@ class DatabasesEndpoint(Endpoint):
         *[🔗 Endpoint documentation](https://developers.notion.com/reference/post-database-query)*
         """  # noqa: E501
         return self.parent.request(
-            path=f"databases/{database_id}", method="GET", auth=kwargs.get("auth")
+            path=f"databases/{database_id}",
+            method="GET",
+            auth=kwargs.get("auth"),
+            cache_validator=kwargs.get("last_edited_time"),
         )
 
     def create(self, **kwargs: Any) -> SyncAsync[Any]:
@@ -181,6 +188,7 @@ class PagesPropertiesEndpoint(Endpoint):
             method="GET",
             auth=kwargs.get("auth"),
             query=pick(kwargs, "start_cursor", "page_size"),
+            cache_validator=kwargs.get("last_edited_time"),
         )
 
 
@@ -207,7 +215,10 @@ class PagesEndpoint(Endpoint):
         *[🔗 Endpoint documentation](https://developers.notion.com/reference/retrieve-a-page)*
         """  # noqa: E501
         return self.parent.request(
-            path=f"pages/{page_id}", method="GET", auth=kwargs.get("auth")
+            path=f"pages/{page_id}",
+            method="GET",
+            auth=kwargs.get("auth"),
+            cache_validator=kwargs.get("last_edited_time"),
         )
 
     def update(self, page_id: str, **kwargs: Any) -> SyncAsync[Any]:
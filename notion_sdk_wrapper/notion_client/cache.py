@@ -0,0 +1,121 @@
+"""Persistent response cache for notion-sdk-py.
+
+Raw `GET` responses are stored in a SQLite file together with the
+`last_edited_time` of the object they describe. A cached response is only
+returned when the caller already knows the current `last_edited_time` of the
+object (for instance from a database query result or a parent listing) and it
+matches, so validating an entry never costs a request.
+
+Notion rounds `last_edited_time` down to the minute, so a response fetched less
+than a minute after it is not stored: a later edit in the same minute would not
+change the timestamp and the stale response would be served.
+"""
+import json
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime
+from typing import Any, Dict, Optional
+from urllib.parse import urlencode
+
+
+class ResponseCache:
+    """SQLite-backed store of API responses keyed by request path and query.
+
+    Attributes:
+        path: Location of the SQLite file.
+        hits: Number of responses served from the cache.
+        misses: Number of lookups that had to go to the network.
+        settle_seconds: Minimum age of `last_edited_time` when a response is
+            fetched for it to be cached, the precision of the timestamps.
+    """
+
+    FILENAME = "notion_cache.sqlite3"
+
+    def __init__(self, path: str, settle_seconds: float = 60.0) -> None:
+        if os.path.isdir(path) or not os.path.splitext(path)[1]:
+            os.makedirs(path, exist_ok=True)
+            path = os.path.join(path, self.FILENAME)
+        self.path = path
+        self.hits = 0
+        self.misses = 0
+        self.settle_seconds = settle_seconds
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        with self._lock, self._connection:
+            self._connection.execute("PRAGMA journal_mode=WAL")
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                "key TEXT PRIMARY KEY, last_edited_time TEXT NOT NULL, "
+                "body TEXT NOT NULL, stored_at REAL NOT NULL)"
+            )
+
+    @staticmethod
+    def make_key(path: str, query: Optional[Dict[Any, Any]] = None) -> str:
+        """Return the cache key of a request."""
+        if not query:
+            return path
+        return path + "?" + urlencode(sorted(query.items()))
+
+    def is_settled(self, last_edited_time: str, fetched_at: float) -> bool:
+        """Return whether an edit after `fetched_at` would change `last_edited_time`."""
+        try:
+            edited = datetime.fromisoformat(last_edited_time.replace("Z", "+00:00"))
+        except ValueError:
+            return False
+        return fetched_at - edited.timestamp() >= self.settle_seconds
+
+    def get(self, key: str, last_edited_time: str) -> Optional[Any]:
+        """Return the cached response if it was stored for `last_edited_time`."""
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT body, stored_at FROM responses "
+                "WHERE key = ? AND last_edited_time = ?",
+                (key, last_edited_time),
+            ).fetchone()
+        # Entries stored before the settle check may need revalidation
+        if row is None or not self.is_settled(last_edited_time, row[1]):
+            self.misses += 1
+            return None
+        self.hits += 1
+        return json.loads(row[0])
+
+    def set(self, key: str, last_edited_time: str, body: Any) -> None:
+        """Store a response, replacing any previous version.
+
+        A response fetched within `settle_seconds` of `last_edited_time` is not
+        stored, and only drops the previous version.
+        """
+        stored_at = time.time()
+        if not self.is_settled(last_edited_time, stored_at):
+            self.invalidate_key(key)
+            return
+        with self._lock, self._connection:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?)",
+                (key, last_edited_time, json.dumps(body), stored_at),
+            )
+
+    def invalidate_key(self, key: str) -> None:
+        """Drop the response stored under `key`."""
+        with self._lock, self._connection:
+            self._connection.execute("DELETE FROM responses WHERE key = ?", (key,))
+
+    def invalidate(self, prefix: str) -> None:
+        """Drop every response whose key starts with `prefix`."""
+        pattern = prefix.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+        with self._lock, self._connection:
+            self._connection.execute(
+                "DELETE FROM responses WHERE key LIKE ? ESCAPE '\\'", (pattern + "%",)
+            )
+
+    def clear(self) -> None:
+        """Drop every cached response."""
+        with self._lock, self._connection:
+            self._connection.execute("DELETE FROM responses")
+
+    def close(self) -> None:
+        """Close the underlying SQLite connection."""
+        with self._lock:
+            self._connection.close()
@@ -1,8 +1,10 @@
 """Synchronous and asynchronous clients for Notion's API."""
-import json
+import asyncio
 import logging
+import random
+import time
 from abc import abstractclassmethod
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from types import TracebackType
 from typing import Any, Dict, List, Optional, Type, Union
 
@@ -16,13 +18,19 @@ from .api_endpoints import (
     SearchEndpoint,
     UsersEndpoint,
 )
+from .cache import ResponseCache
+from .codec import JSONCodec, get_codec
+from .hooks import ClientHooks, endpoint_name
 from .errors import (
     APIResponseError,
     HTTPResponseError,
     RequestTimeoutError,
     is_api_error_code,
 )
-from .logging import make_console_logger
+from .logging import LazyBody, make_console_logger
+from .rate_limit import TokenBucket
+from .retry import RetryPolicy, is_rate_limited
+from .tracing import NOOP_SPAN, Span, is_tracing, start_span
 from .typing import SyncAsync
 
 
@@ -35,26 +43,74 @@ class ClientOptions:
             should be set on each request.
         timeout_ms: Number of milliseconds to wait before emitting a
             `RequestTimeoutError`.
+        connect_timeout_ms: Number of milliseconds to wait for a connection to be
+            established. Defaults to `timeout_ms`.
+        read_timeout_ms: Number of milliseconds to wait for a chunk of the response.
+            Defaults to `timeout_ms`.
         base_url: The root URL for sending API requests. This can be changed to test with
             a mock server.
         log_level: Verbosity of logs the instance will produce. By default, logs are
             written to `stdout`.
         logger: A custom logger.
+        log_body_limit: Maximum number of characters of the request and response
+            bodies logged at the `DEBUG` level, `None` to log them whole.
+        log_body_sample_rate: Fraction of the requests whose bodies are logged at the
+            `DEBUG` level, between 0 and 1.
         notion_version: Notion version to use.
+        rate_limit: Sustained number of requests per second allowed by the client-side
+            token bucket. Set to `None` to disable client-side rate limiting.
+        rate_limit_burst: Number of requests that can be sent at once before the
+            sustained rate applies.
+        rate_limiter: A `TokenBucket` to use instead of creating one, so several
+            clients can share the same budget.
+        retry: Policy used to retry failed requests. Set to `None` to disable retries.
+        cache: A `ResponseCache`, or the directory where to create one, to persist
+            responses between runs. Cached responses are only served when the request
+            carries the expected `last_edited_time` of the object.
+        max_connections: Maximum number of concurrent connections of the pool.
+        max_keepalive_connections: Number of idle connections kept open for reuse.
+            Raise it to the number of workers of batch jobs so they do not have to
+            open new TLS connections.
+        keepalive_expiry: Seconds an idle connection is kept open.
+        http2: Use HTTP/2, which multiplexes concurrent requests over a single
+            connection. Requires the `h2` package (`pip install httpx[http2]`).
+        hooks: `ClientHooks` called around every request attempt, e.g. a
+            `MetricsCollector`.
+        json_codec: `JSONCodec` encoding the request bodies and decoding the
+            responses, or its name: `json` (the standard library), `orjson`,
+            `msgspec`, or `auto` for the fastest one installed.
+
+    The pool options only apply to the HTTP clients created by the client, not to
+    an `httpx` client passed to it.
     """
 
     auth: Optional[str] = None
     timeout_ms: int = 60_000
+    connect_timeout_ms: Optional[int] = None
+    read_timeout_ms: Optional[int] = None
     base_url: str = "https://api.notion.com"
     log_level: int = logging.WARNING
     logger: Optional[logging.Logger] = None
+    log_body_limit: Optional[int] = 1_000
+    log_body_sample_rate: float = 1.0
     notion_version: str = "2022-06-28"
+    rate_limit: Optional[float] = 3.0
+    rate_limit_burst: int = 5
+    rate_limiter: Optional[TokenBucket] = None
+    retry: Optional[RetryPolicy] = field(default_factory=RetryPolicy)
+    cache: Optional[Union[str, ResponseCache]] = None
+    max_connections: Optional[int] = 100
+    max_keepalive_connections: Optional[int] = 20
+    keepalive_expiry: Optional[float] = 5.0
+    http2: bool = False
+    hooks: List[ClientHooks] = field(default_factory=list)
+    json_codec: Union[str, JSONCodec] = "json"
 
 
 class BaseClient:
     def __init__(
         self,
-        client: Union[httpx.Client, httpx.AsyncClient],
+        client: Optional[Union[httpx.Client, httpx.AsyncClient]],
         options: Optional[Union[Dict[str, Any], ClientOptions]] = None,
         **kwargs: Any,
     ) -> None:
@@ -67,8 +123,23 @@ class BaseClient:
         self.logger.setLevel(options.log_level)
         self.options = options
 
+        self.rate_limiter = options.rate_limiter
+        if self.rate_limiter is None and options.rate_limit:
+            self.rate_limiter = TokenBucket(options.rate_limit, options.rate_limit_burst)
+
+        self.cache = options.cache
+        if isinstance(self.cache, str):
+            self.cache = ResponseCache(self.cache)
+
+        self.hooks = list(options.hooks)
+        self.json_codec = get_codec(options.json_codec)
+
         self._clients: List[Union[httpx.Client, httpx.AsyncClient]] = []
-        self.client = client
+        # Whether each `with` block pushed a pool of its own, closed on exit
+        self._pushed: List[bool] = []
+        # A client passed by the caller is never replaced
+        self._owns_client = client is None
+        self.client = client if client is not None else self._make_client()
 
         self.blocks = BlocksEndpoint(self)
         self.databases = DatabasesEndpoint(self)
@@ -76,6 +147,47 @@ class BaseClient:
         self.pages = PagesEndpoint(self)
         self.search = SearchEndpoint(self)
 
+    @abstractclassmethod
+    def _make_client(self) -> Union[httpx.Client, httpx.AsyncClient]:
+        # noqa
+        pass
+
+    def _client_kwargs(self) -> Dict[str, Any]:
+        """Return the arguments of the HTTP clients created from the options."""
+        return {
+            "limits": httpx.Limits(
+                max_connections=self.options.max_connections,
+                max_keepalive_connections=self.options.max_keepalive_connections,
+                keepalive_expiry=self.options.keepalive_expiry,
+            ),
+            "http2": self.options.http2,
+        }
+
+    def _timeout(self) -> httpx.Timeout:
+        timeout = self.options.timeout_ms / 1_000
+        connect = self.options.connect_timeout_ms
+        read = self.options.read_timeout_ms
+        return httpx.Timeout(
+            timeout,
+            connect=timeout if connect is None else connect / 1_000,
+            read=timeout if read is None else read / 1_000,
+        )
+
+    def _reopen(self) -> None:
+        """Replace the current client with a new one if it was closed by `close()`.
+
+        Only the clients created by the client are replaced, a closed client passed by
+        the caller raises `RuntimeError`.
+        """
+        if not self.client.is_closed:
+            return
+        if not self._owns_client:
+            raise RuntimeError(
+                "The httpx client passed to the client was closed, pass a new one"
+            )
+        self._clients.pop()
+        self.client = self._make_client()
+
     @property
     def client(self) -> Union[httpx.Client, httpx.AsyncClient]:
         return self._clients[-1]
@@ -83,7 +195,7 @@ class BaseClient:
     @client.setter
     def client(self, client: Union[httpx.Client, httpx.AsyncClient]) -> None:
         client.base_url = httpx.URL(self.options.base_url + "/v1/")
-        client.timeout = httpx.Timeout(timeout=self.options.timeout_ms / 1_000)
+        client.timeout = self._timeout()
         client.headers = httpx.Headers(
             {
                 "Notion-Version": self.options.notion_version,
@@ -102,33 +214,153 @@ class BaseClient:
         body: Optional[Dict[Any, Any]] = None,
         auth: Optional[str] = None,
     ) -> Request:
+        self._reopen()
         headers = httpx.Headers()
         if auth:
             headers["Authorization"] = f"Bearer {auth}"
-        self.logger.info(f"{method} {self.client.base_url}{path}")
-        self.logger.debug(f"=> {query} -- {body}")
-        return self.client.build_request(
-            method, path, params=query, json=body, headers=headers
+        if self.logger.isEnabledFor(logging.INFO):
+            self.logger.info("%s %s%s", method, self.client.base_url, path)
+        content = None
+        if body is not None:
+            content = self.json_codec.dumps(body)
+            headers["Content-Type"] = "application/json"
+        request = self.client.build_request(
+            method, path, params=query, content=content, headers=headers
         )
+        if self._log_bodies():
+            # The response body of a sampled request is logged as well
+            request.extensions["notion_log_body"] = True
+            limit = self.options.log_body_limit
+            self.logger.debug("=> %s -- %s", LazyBody(query, limit), LazyBody(body, limit))
+        return request
+
+    def _log_bodies(self) -> bool:
+        """Return whether the bodies of a new request should be logged."""
+        if not self.logger.isEnabledFor(logging.DEBUG):
+            return False
+        rate = self.options.log_body_sample_rate
+        return rate >= 1 or random.random() < rate
 
     def _parse_response(self, response: Response) -> Any:
         try:
             response.raise_for_status()
         except httpx.HTTPStatusError as error:
             try:
-                body = error.response.json()
+                body = self.json_codec.loads(response.content)
                 code = body.get("code")
-            except json.JSONDecodeError:
+            except ValueError:
                 code = None
             if code and is_api_error_code(code):
                 raise APIResponseError(response, body["message"], code)
             raise HTTPResponseError(error.response)
 
-        body = response.json()
-        self.logger.debug(f"=> {body}")
+        body = self.json_codec.loads(response.content)
+        if self.logger.isEnabledFor(logging.DEBUG) and response.request.extensions.get(
+            "notion_log_body"
+        ):
+            self.logger.debug("=> %s", LazyBody(body, self.options.log_body_limit))
+
+        return body
+
+    def _call_hooks(self, event: str, *args: Any) -> None:
+        for hook in self.hooks:
+            try:
+                getattr(hook, event)(*args)
+            except Exception:
+                self.logger.exception("%s.%s failed", type(hook).__name__, event)
 
+    def _start_span(
+        self,
+        method: str,
+        path: str,
+        query: Optional[Dict[Any, Any]],
+        body: Optional[Dict[Any, Any]],
+    ) -> Span:
+        """Return the span of a request, the no-op span when tracing is disabled."""
+        if not is_tracing():
+            return NOOP_SPAN
+        attributes = {
+            "http.method": method,
+            "notion.endpoint": endpoint_name(method, path),
+            "notion.path": path,
+        }
+        cursor = (query or {}).get("start_cursor") or (body or {}).get("start_cursor")
+        if cursor:
+            attributes["notion.start_cursor"] = cursor
+        return start_span("notion.request", attributes)
+
+    def _get_cached_response(
+        self,
+        method: str,
+        path: str,
+        query: Optional[Dict[Any, Any]],
+        cache_validator: Optional[str],
+    ) -> Any:
+        """Return the cached response of a `GET` request, or `None`."""
+        if self.cache is None or method != "GET" or cache_validator is None:
+            return None
+        cached = self.cache.get(self.cache.make_key(path, query), cache_validator)
+        if cached is not None:
+            self.logger.info("%s %s served from cache", method, path)
+        return cached
+
+    def _cache_response(
+        self,
+        method: str,
+        path: str,
+        query: Optional[Dict[Any, Any]],
+        cache_validator: Optional[str],
+        body: Any,
+    ) -> Any:
+        """Store `body` in the cache and return it."""
+        if self.cache is None or not isinstance(body, dict):
+            return body
+        if method == "GET":
+            # Objects carry their own `last_edited_time`, listings are validated
+            # by the `last_edited_time` of their parent
+            validator = body.get("last_edited_time", cache_validator)
+            if validator is not None:
+                self.cache.set(self.cache.make_key(path, query), validator, body)
+            return body
+        # A write makes every cached response about the object stale
+        object_path = path.rsplit("/children", 1)[0]
+        if object_path != path or method in ("PATCH", "DELETE"):
+            self.cache.invalidate(object_path)
+        if body.get("object") in ("page", "block", "database") and "id" in body:
+            key = f"{body['object']}s/{body['id']}"
+            self.cache.invalidate(key)
+            if "last_edited_time" in body:
+                self.cache.set(key, body["last_edited_time"], body)
         return body
 
+    def _get_retry_delay(
+        self, error: Exception, request: Request, path: str, attempt: int
+    ) -> Optional[float]:
+        """Return how long to wait before retrying, or `None` to give up."""
+        if self.options.retry is None:
+            return None
+        method = request.method
+        delay = self.options.retry.get_delay(error, method, path, attempt)
+        if delay is None:
+            return None
+        if is_rate_limited(error):
+            if self.rate_limiter is not None:
+                # Hold back every other request sharing the bucket, not only this one
+                self.rate_limiter.pause(delay)
+            if self.hooks:
+                self._call_hooks("on_rate_limited", request, delay, True)
+        if self.hooks:
+            self._call_hooks("on_retry", request, error, attempt, delay)
+        self.logger.warning(
+            "%s %s failed (%s), retrying in %.2fs (attempt %d)",
+            method,
+            path,
+            error,
+            delay,
+            attempt + 1,
+        )
+        return delay
+
     @abstractclassmethod
     def request(
         self,
@@ -137,6 +369,7 @@ class BaseClient:
         query: Optional[Dict[Any, Any]] = None,
         body: Optional[Dict[Any, Any]] = None,
         auth: Optional[str] = None,
+        cache_validator: Optional[str] = None,
     ) -> SyncAsync[Any]:
         # noqa
         pass
@@ -153,13 +386,20 @@ class Client(BaseClient):
         client: Optional[httpx.Client] = None,
         **kwargs: Any,
     ) -> None:
-        if client is None:
-            client = httpx.Client()
         super().__init__(client, options, **kwargs)
 
+    def _make_client(self) -> httpx.Client:
+        return httpx.Client(**self._client_kwargs())
+
     def __enter__(self) -> "Client":
-        self.client = httpx.Client()
-        self.client.__enter__()
+        self._reopen()
+        if self._owns_client:
+            # A pool of its own for the block, closed on exit, so the client stays
+            # usable afterwards
+            self.client = self._make_client()
+            self.client.__enter__()
+        # A client passed by the caller is used as is and left open
+        self._pushed.append(self._owns_client)
         return self
 
     def __exit__(
@@ -168,11 +408,15 @@ class Client(BaseClient):
         exc_value: BaseException,
         traceback: TracebackType,
     ) -> None:
-        self.client.__exit__(exc_type, exc_value, traceback)
-        del self._clients[-1]
+        if self._pushed.pop():
+            self.client.__exit__(exc_type, exc_value, traceback)
+            del self._clients[-1]
 
     def close(self) -> None:
-        """Close the connection pool of the current inner client."""
+        """Close the connection pool of the current inner client.
+
+        A client created by the client is replaced by a new one on the next request.
+        """
         self.client.close()
 
     def request(
@@ -182,14 +426,49 @@ class Client(BaseClient):
         query: Optional[Dict[Any, Any]] = None,
         body: Optional[Dict[Any, Any]] = None,
         auth: Optional[str] = None,
+        cache_validator: Optional[str] = None,
     ) -> Any:
-        """Send an HTTP request."""
+        """Send an HTTP request.
+
+        `cache_validator` is the `last_edited_time` the caller expects for the object,
+        a cached response stored for it is returned without sending the request.
+        """
+        cached = self._get_cached_response(method, path, query, cache_validator)
+        if cached is not None:
+            return cached
         request = self._build_request(method, path, query, body, auth)
-        try:
-            response = self.client.send(request)
-        except httpx.TimeoutException:
-            raise RequestTimeoutError()
-        return self._parse_response(response)
+        with self._start_span(method, path, query, body) as span:
+            attempt = 0
+            while True:
+                if self.rate_limiter is not None:
+                    wait = self.rate_limiter.acquire()
+                    if wait and self.hooks:
+                        self._call_hooks("on_rate_limited", request, wait, False)
+                if self.hooks:
+                    self._call_hooks("on_request", request, attempt)
+                try:
+                    try:
+                        start = time.perf_counter()
+                        response = self.client.send(request)
+                    except httpx.TimeoutException:
+                        raise RequestTimeoutError()
+                    if self.hooks:
+                        self._call_hooks(
+                            "on_response", request, response, time.perf_counter() - start
+                        )
+                    span.set_attribute("http.status_code", response.status_code)
+                    return self._cache_response(
+                        method, path, query, cache_validator, self._parse_response(response)
+                    )
+                except (RequestTimeoutError, HTTPResponseError) as error:
+                    delay = self._get_retry_delay(error, request, path, attempt)
+                    if delay is None:
+                        raise
+                    span.add_event(
+                        "retry", {"attempt": attempt + 1, "delay": delay, "error": str(error)}
+                    )
+                time.sleep(delay)
+                attempt += 1
 
 
 class AsyncClient(BaseClient):
@@ -203,13 +482,20 @@ class AsyncClient(BaseClient):
         client: Optional[httpx.AsyncClient] = None,
         **kwargs: Any,
     ) -> None:
-        if client is None:
-            client = httpx.AsyncClient()
         super().__init__(client, options, **kwargs)
 
+    def _make_client(self) -> httpx.AsyncClient:
+        return httpx.AsyncClient(**self._client_kwargs())
+
     async def __aenter__(self) -> "AsyncClient":
-        self.client = httpx.AsyncClient()
-        await self.client.__aenter__()
+        self._reopen()
+        if self._owns_client:
+            # A pool of its own for the block, closed on exit, so the client stays
+            # usable afterwards
+            self.client = self._make_client()
+            await self.client.__aenter__()
+        # A client passed by the caller is used as is and left open
+        self._pushed.append(self._owns_client)
         return self
 
     async def __aexit__(
@@ -218,11 +504,12 @@ class AsyncClient(BaseClient):
         exc_value: BaseException,
         traceback: TracebackType,
     ) -> None:
-        await self.client.__aexit__(exc_type, exc_value, traceback)
-        del self._clients[-1]
+        if self._pushed.pop():
+            await self.client.__aexit__(exc_type, exc_value, traceback)
+            del self._clients[-1]
 
     async def aclose(self) -> None:
-        """Close the connection pool of the current inner client."""
+        """Close the connection pool of the current inner client, see `Client.close`."""
         await self.client.aclose()
 
     async def request(
@@ -232,11 +519,46 @@ class AsyncClient(BaseClient):
         query: Optional[Dict[Any, Any]] = None,
         body: Optional[Dict[Any, Any]] = None,
         auth: Optional[str] = None,
+        cache_validator: Optional[str] = None,
     ) -> Any:
-        """Send an HTTP request asynchronously."""
+        """Send an HTTP request asynchronously.
+
+        `cache_validator` is the `last_edited_time` the caller expects for the object,
+        a cached response stored for it is returned without sending the request.
+        """
+        cached = self._get_cached_response(method, path, query, cache_validator)
+        if cached is not None:
+            return cached
         request = self._build_request(method, path, query, body, auth)
-        try:
-            response = await self.client.send(request)
-        except httpx.TimeoutException:
-            raise RequestTimeoutError()
-        return self._parse_response(response)
+        with self._start_span(method, path, query, body) as span:
+            attempt = 0
+            while True:
+                if self.rate_limiter is not None:
+                    wait = await self.rate_limiter.acquire_async()
+                    if wait and self.hooks:
+                        self._call_hooks("on_rate_limited", request, wait, False)
+                if self.hooks:
+                    self._call_hooks("on_request", request, attempt)
+                try:
+                    try:
+                        start = time.perf_counter()
+                        response = await self.client.send(request)
+                    except httpx.TimeoutException:
+                        raise RequestTimeoutError()
+                    if self.hooks:
+                        self._call_hooks(
+                            "on_response", request, response, time.perf_counter() - start
+                        )
+                    span.set_attribute("http.status_code", response.status_code)
+                    return self._cache_response(
+                        method, path, query, cache_validator, self._parse_response(response)
+                    )
+                except (RequestTimeoutError, HTTPResponseError) as error:
+                    delay = self._get_retry_delay(error, request, path, attempt)
+                    if delay is None:
+                        raise
+                    span.add_event(
+                        "retry", {"attempt": attempt + 1, "delay": delay, "error": str(error)}
+                    )
+                await asyncio.sleep(delay)
+                attempt += 1
@@ -0,0 +1,117 @@
+"""JSON codecs used by the clients to encode request bodies and decode responses.
+
+`StdlibCodec` is the default. `OrjsonCodec` and `MsgspecCodec` are much faster on
+large database query responses but require `orjson` or `msgspec`; `get_codec("auto")`
+returns the fastest codec installed.
+"""
+import json
+from typing import Any, Callable, Dict, Union
+
+
+class JSONCodec:
+    """Base class of the codecs.
+
+    `loads` raises a `ValueError` on invalid JSON, whatever the library used.
+    """
+
+    name = ""
+
+    def dumps(self, obj: Any) -> bytes:
+        """Return `obj` encoded as UTF-8 JSON."""
+        raise NotImplementedError
+
+    def loads(self, data: bytes) -> Any:
+        """Return the decoded JSON document `data`."""
+        raise NotImplementedError
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}()"
+
+
+class StdlibCodec(JSONCodec):
+    """Codec using the `json` module of the standard library."""
+
+    name = "json"
+
+    def __init__(self) -> None:
+        self._encoder = json.JSONEncoder(ensure_ascii=False, separators=(",", ":"))
+        self._decoder = json.JSONDecoder()
+
+    def dumps(self, obj: Any) -> bytes:
+        return self._encoder.encode(obj).encode("utf-8")
+
+    def loads(self, data: bytes) -> Any:
+        # `json.loads` also detects UTF-16 and UTF-32, the API only sends UTF-8
+        return self._decoder.decode(data.decode("utf-8"))
+
+
+class OrjsonCodec(JSONCodec):
+    """Codec using `orjson` (`pip install orjson`)."""
+
+    name = "orjson"
+
+    def __init__(self) -> None:
+        import orjson
+
+        self._dumps = orjson.dumps
+        # `orjson.JSONDecodeError` is a `ValueError`
+        self._loads = orjson.loads
+
+    def dumps(self, obj: Any) -> bytes:
+        return self._dumps(obj)
+
+    def loads(self, data: bytes) -> Any:
+        return self._loads(data)
+
+
+class MsgspecCodec(JSONCodec):
+    """Codec using `msgspec` (`pip install msgspec`)."""
+
+    name = "msgspec"
+
+    def __init__(self) -> None:
+        import msgspec
+
+        self._encode = msgspec.json.Encoder().encode
+        self._decode = msgspec.json.Decoder().decode
+        self._decode_error = msgspec.DecodeError
+
+    def dumps(self, obj: Any) -> bytes:
+        return self._encode(obj)
+
+    def loads(self, data: bytes) -> Any:
+        try:
+            return self._decode(data)
+        except self._decode_error as error:
+            raise ValueError(str(error)) from error
+
+
+CODECS: Dict[str, Callable[[], JSONCodec]] = {
+    "json": StdlibCodec,
+    "orjson": OrjsonCodec,
+    "msgspec": MsgspecCodec,
+}
+
+# Fastest first, for `get_codec("auto")`
+_PREFERENCE = ["orjson", "msgspec", "json"]
+
+
+def get_codec(codec: Union[str, JSONCodec]) -> JSONCodec:
+    """Return the codec named `codec` (`json`, `orjson`, `msgspec` or `auto`).
+
+    A `JSONCodec` instance is returned as is. `auto` picks the fastest installed
+    library, falling back to the standard library.
+    """
+    if isinstance(codec, JSONCodec):
+        return codec
+    if codec == "auto":
+        for name in _PREFERENCE:
+            try:
+                return CODECS[name]()
+            except ImportError:
+                continue
+    if codec not in CODECS:
+        raise ValueError(
+            f"Unknown JSON codec {codec!r}, expected one of {sorted(CODECS)} or 'auto'"
+        )
+    return CODECS[codec]()
@@ -3,9 +3,10 @@
 This module defines the exceptions that can be raised when an error occurs.
 """
 from enum import Enum
-from typing import Optional
+from typing import TYPE_CHECKING, Optional
 
-import httpx
+if TYPE_CHECKING:
+    import httpx
 
 
 class RequestTimeoutError(Exception):
@@ -31,10 +32,10 @@ class HTTPResponseError(Exception):
 
     code: str = "notionhq_client_response_error"
     status: int
-    headers: httpx.Headers
+    headers: "httpx.Headers"
     body: str
 
-    def __init__(self, response: httpx.Response, message: Optional[str] = None) -> None:
+    def __init__(self, response: "httpx.Response", message: Optional[str] = None) -> None:
         if message is None:
             message = (
                 f"Request to Notion API failed with status: {response.status_code}"
@@ -92,7 +93,7 @@ class APIResponseError(HTTPResponseError):
     code: APIErrorCode
 
     def __init__(
-        self, response: httpx.Response, message: str, code: APIErrorCode
+        self, response: "httpx.Response", message: str, code: APIErrorCode
     ) -> None:
         super().__init__(response, message)
         self.code = code
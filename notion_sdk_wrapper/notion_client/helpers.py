@@ -1,5 +1,5 @@
 """Utility functions for notion-sdk-py."""
-from typing import Any, Dict
+from typing import Any, AsyncGenerator, Awaitable, Callable, Dict, Generator
 from urllib.parse import urlparse
 from uuid import UUID
 
@@ -24,3 +24,34 @@ def get_id(url: str) -> str:
         raise ValueError("The path in the URL seems to be incorrect.")
     raw_id = path[-32:]
     return str(UUID(raw_id))
+
+
+def iterate_paginated_api(
+    function: Callable[..., Any], **kwargs: Any
+) -> Generator[Any, None, None]:
+    """Return an iterator over the results of any paginated Notion API.
+
+    Pages are requested one at a time as the iterator is consumed, e.g.
+    `iterate_paginated_api(notion.pages.properties.retrieve, page_id=..., property_id=...)`.
+    """
+    next_cursor = kwargs.pop("start_cursor", None)
+    while True:
+        response = function(**kwargs, start_cursor=next_cursor)
+        yield from response["results"]
+        next_cursor = response.get("next_cursor")
+        if not response.get("has_more") or not next_cursor:
+            return
+
+
+async def async_iterate_paginated_api(
+    function: Callable[..., Awaitable[Any]], **kwargs: Any
+) -> AsyncGenerator[Any, None]:
+    """Return an async iterator over the results of any paginated Notion API."""
+    next_cursor = kwargs.pop("start_cursor", None)
+    while True:
+        response = await function(**kwargs, start_cursor=next_cursor)
+        for result in response["results"]:
+            yield result
+        next_cursor = response.get("next_cursor")
+        if not response.get("has_more") or not next_cursor:
+            return
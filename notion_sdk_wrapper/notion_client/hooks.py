@@ -0,0 +1,210 @@
+"""Instrumentation hooks and metrics for notion-sdk-py.
+
+Hooks are objects passed in `ClientOptions.hooks`; the client calls their methods
+around every HTTP attempt. `MetricsCollector` is a hook aggregating per-endpoint
+metrics, exportable as a dict or in the Prometheus text format.
+"""
+import re
+import threading
+from bisect import bisect_left
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from httpx import Request, Response
+
+# Object IDs in request paths, with or without dashes
+_ID_PATTERN = re.compile(
+    r"(?<=/)[0-9a-fA-F]{8}-?[0-9a-fA-F]{4}-?[0-9a-fA-F]{4}-?[0-9a-fA-F]{4}-?[0-9a-fA-F]{12}(?=/|$)"
+)
+
+DEFAULT_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+def endpoint_name(method: str, path: str) -> str:
+    """Return the endpoint of a request with the object IDs replaced by `{id}`.
+
+    For instance `POST databases/{id}/query`.
+    """
+    path = path.split("?", 1)[0].strip("/")
+    if path.startswith("v1/"):
+        path = path[3:]
+    return f"{method} {_ID_PATTERN.sub('{id}', '/' + path)[1:]}"
+
+
+class ClientHooks:
+    """Base class of the request hooks, every method is a no-op.
+
+    Subclass it and override the events of interest. Hooks run in the thread (or
+    event loop) sending the request, so they should be quick; an exception raised
+    by a hook is logged and ignored.
+    """
+
+    def on_request(self, request: Request, attempt: int) -> None:
+        """Called before every attempt to send `request`, starting at attempt 0."""
+
+    def on_response(self, request: Request, response: Response, elapsed: float) -> None:
+        """Called when a response is received, whatever its status, `elapsed` in seconds."""
+
+    def on_retry(
+        self, request: Request, error: Exception, attempt: int, delay: float
+    ) -> None:
+        """Called when `request` failed with `error` and is retried in `delay` seconds."""
+
+    def on_rate_limited(self, request: Request, wait: float, server: bool) -> None:
+        """Called when `request` is held back `wait` seconds by rate limiting.
+
+        `server` is False for the client-side token bucket, True for a `rate_limited`
+        response from the API.
+        """
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class _EndpointMetrics:
+    def __init__(self, buckets: Sequence[float]) -> None:
+        self.bucket_counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.duration = 0.0
+        self.bytes_sent = 0
+        self.bytes_received = 0
+        self.statuses: Dict[int, int] = {}
+        self.retries = 0
+
+
+class MetricsCollector(ClientHooks):
+    """Hook recording request metrics per endpoint (see `endpoint_name`).
+
+    Recorded: latency histograms, bytes sent and received, status code counts,
+    retries, and the number and time of requests held back by rate limiting.
+
+    Attributes:
+        buckets: Upper bounds, in seconds, of the latency histogram buckets.
+    """
+
+    def __init__(self, buckets: Sequence[float] = DEFAULT_BUCKETS) -> None:
+        self.buckets = tuple(sorted(buckets))
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        """Forget everything recorded so far."""
+        with self._lock:
+            self._endpoints: Dict[str, _EndpointMetrics] = {}
+            self._rate_limited = {"client": [0, 0.0], "server": [0, 0.0]}
+
+    def _endpoint(self, request: Request) -> _EndpointMetrics:
+        name = endpoint_name(request.method, request.url.path)
+        metrics = self._endpoints.get(name)
+        if metrics is None:
+            metrics = self._endpoints[name] = _EndpointMetrics(self.buckets)
+        return metrics
+
+    def on_response(self, request: Request, response: Response, elapsed: float) -> None:
+        with self._lock:
+            metrics = self._endpoint(request)
+            metrics.bucket_counts[bisect_left(self.buckets, elapsed)] += 1
+            metrics.count += 1
+            metrics.duration += elapsed
+            metrics.bytes_sent += len(request.content)
+            metrics.bytes_received += len(response.content)
+            status = response.status_code
+            metrics.statuses[status] = metrics.statuses.get(status, 0) + 1
+
+    def on_retry(
+        self, request: Request, error: Exception, attempt: int, delay: float
+    ) -> None:
+        with self._lock:
+            self._endpoint(request).retries += 1
+
+    def on_rate_limited(self, request: Request, wait: float, server: bool) -> None:
+        with self._lock:
+            entry = self._rate_limited["server" if server else "client"]
+            entry[0] += 1
+            entry[1] += wait
+
+    def as_dict(self) -> Dict[str, Any]:
+        """Return a snapshot of the metrics as plain data."""
+        with self._lock:
+            endpoints = {}
+            for name, metrics in sorted(self._endpoints.items()):
+                cumulative = 0
+                histogram: List[Tuple[Optional[float], int]] = []
+                for bound, count in zip(
+                    list(self.buckets) + [None], metrics.bucket_counts
+                ):
+                    cumulative += count
+                    histogram.append((bound, cumulative))
+                endpoints[name] = {
+                    "count": metrics.count,
+                    "duration": metrics.duration,
+                    "histogram": histogram,
+                    "bytes_sent": metrics.bytes_sent,
+                    "bytes_received": metrics.bytes_received,
+                    "statuses": dict(metrics.statuses),
+                    "retries": metrics.retries,
+                }
+            rate_limited = {
+                source: {"count": count, "wait": wait}
+                for source, (count, wait) in self._rate_limited.items()
+            }
+        return {"endpoints": endpoints, "rate_limited": rate_limited}
+
+    def to_prometheus(self, prefix: str = "notion_client") -> str:
+        """Return the metrics in the Prometheus text exposition format."""
+        data = self.as_dict()
+        lines = [
+            f"# HELP {prefix}_request_duration_seconds Latency of the API requests.",
+            f"# TYPE {prefix}_request_duration_seconds histogram",
+        ]
+        for name, metrics in data["endpoints"].items():
+            label = f'endpoint="{_escape(name)}"'
+            for bound, count in metrics["histogram"]:
+                le = "+Inf" if bound is None else repr(float(bound))
+                lines.append(
+                    f'{prefix}_request_duration_seconds_bucket{{{label},le="{le}"}} {count}'
+                )
+            lines.append(
+                f"{prefix}_request_duration_seconds_sum{{{label}}} {metrics['duration']}"
+            )
+            lines.append(
+                f"{prefix}_request_duration_seconds_count{{{label}}} {metrics['count']}"
+            )
+        counters = [
+            ("requests_total", "Responses received, by status code."),
+            ("request_bytes_total", "Bytes sent in request bodies."),
+            ("response_bytes_total", "Bytes received in response bodies."),
+            ("retries_total", "Requests retried."),
+        ]
+        for counter, description in counters:
+            lines.append(f"# HELP {prefix}_{counter} {description}")
+            lines.append(f"# TYPE {prefix}_{counter} counter")
+            for name, metrics in data["endpoints"].items():
+                label = f'endpoint="{_escape(name)}"'
+                if counter == "requests_total":
+                    for status, count in sorted(metrics["statuses"].items()):
+                        lines.append(
+                            f'{prefix}_{counter}{{{label},status="{status}"}} {count}'
+                        )
+                    continue
+                value = {
+                    "request_bytes_total": metrics["bytes_sent"],
+                    "response_bytes_total": metrics["bytes_received"],
+                    "retries_total": metrics["retries"],
+                }[counter]
+                lines.append(f"{prefix}_{counter}{{{label}}} {value}")
+        lines.append(
+            f"# HELP {prefix}_rate_limited_total Requests held back by rate limiting."
+        )
+        lines.append(f"# TYPE {prefix}_rate_limited_total counter")
+        for source, entry in data["rate_limited"].items():
+            lines.append(f'{prefix}_rate_limited_total{{source="{source}"}} {entry["count"]}')
+        lines.append(
+            f"# HELP {prefix}_rate_limit_wait_seconds_total Time spent waiting for rate limiting."
+        )
+        lines.append(f"# TYPE {prefix}_rate_limit_wait_seconds_total counter")
+        for source, entry in data["rate_limited"].items():
+            lines.append(
+                f'{prefix}_rate_limit_wait_seconds_total{{source="{source}"}} {entry["wait"]}'
+            )
+        return "\n".join(lines) + "\n"
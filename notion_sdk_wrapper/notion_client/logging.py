@@ -2,13 +2,84 @@
 
 import logging
 from logging import Logger
+from typing import Any, List, Optional
 
 
 def make_console_logger() -> Logger:
-    """Return a custom logger."""
+    """Return a custom logger.
+
+    The console handler is only added once, however many clients are created.
+    """
     logger = logging.getLogger(__package__)
-    handler = logging.StreamHandler()
-    formatter = logging.Formatter(logging.BASIC_FORMAT)
-    handler.setFormatter(formatter)
-    logger.addHandler(handler)
+    if not any(getattr(handler, "_notion_console", False) for handler in logger.handlers):
+        handler = logging.StreamHandler()
+        formatter = logging.Formatter(logging.BASIC_FORMAT)
+        handler.setFormatter(formatter)
+        handler._notion_console = True  # type: ignore[attr-defined]
+        logger.addHandler(handler)
     return logger
+
+
+class _Truncated(Exception):
+    pass
+
+
+def _write(value: Any, parts: List[str], budget: List[int]) -> None:
+    # Like `repr`, but stops as soon as `budget` characters were written
+    if isinstance(value, dict):
+        parts.append("{")
+        for index, (key, item) in enumerate(value.items()):
+            if index:
+                parts.append(", ")
+                budget[0] -= 2
+            parts.append(f"{key!r}: ")
+            budget[0] -= len(parts[-1])
+            _write(item, parts, budget)
+        parts.append("}")
+    elif isinstance(value, list):
+        parts.append("[")
+        for index, item in enumerate(value):
+            if index:
+                parts.append(", ")
+                budget[0] -= 2
+            _write(item, parts, budget)
+        parts.append("]")
+    else:
+        parts.append(repr(value))
+        budget[0] -= len(parts[-1])
+    if budget[0] < 0:
+        raise _Truncated
+
+
+def format_body(body: Any, limit: Optional[int]) -> str:
+    """Return the text of a JSON body, cut after `limit` characters unless `None`.
+
+    Only the beginning of the body is formatted, whatever its size.
+    """
+    if limit is None:
+        return str(body)
+    parts: List[str] = []
+    try:
+        _write(body, parts, [limit])
+    except _Truncated:
+        return "".join(parts)[:limit] + "..."
+    return "".join(parts)
+
+
+class LazyBody:
+    """Request or response body formatted only if the log record is emitted.
+
+    Args:
+        body: The decoded JSON body.
+        limit: Maximum number of characters of the formatted body, `None` for the
+            whole body.
+    """
+
+    __slots__ = ("body", "limit")
+
+    def __init__(self, body: Any, limit: Optional[int]) -> None:
+        self.body = body
+        self.limit = limit
+
+    def __str__(self) -> str:
+        return format_body(self.body, self.limit)
@@ -0,0 +1,102 @@
+"""Client-side rate limiting for notion-sdk-py.
+
+Notion allows an average of three requests per second per integration, with some
+bursts beyond that. Pacing requests before they are sent is cheaper than waiting
+for `rate_limited` errors.
+"""
+import asyncio
+import threading
+import time
+from typing import Any, Dict
+
+
+class TokenBucket:
+    """Thread-safe token bucket shared by every request of one or more clients.
+
+    Tokens are reserved rather than polled: a caller takes a token immediately,
+    possibly driving the balance negative, and is told how long to wait for it.
+    This keeps callers in FIFO order and lets threads and asyncio tasks share the
+    same budget.
+
+    Attributes:
+        rate: Number of tokens added per second (the sustained request rate).
+        capacity: Maximum number of tokens that can be accumulated (the burst size).
+    """
+
+    def __init__(self, rate: float = 3.0, capacity: float = 5.0) -> None:
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        if capacity < 1:
+            raise ValueError("capacity must be at least 1")
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = float(capacity)
+        self._updated_at = time.monotonic()
+        self._lock = threading.Lock()
+        self.acquired = 0
+        self.throttled = 0
+        self.total_wait = 0.0
+
+    def _refill(self, now: float) -> None:
+        elapsed = now - self._updated_at
+        if elapsed > 0:
+            self._tokens = min(self.capacity, self._tokens + elapsed * self.rate)
+            self._updated_at = now
+
+    def reserve(self, tokens: float = 1.0) -> float:
+        """Take `tokens` from the bucket and return the number of seconds to wait."""
+        with self._lock:
+            self._refill(time.monotonic())
+            self._tokens -= tokens
+            self.acquired += 1
+            if self._tokens >= 0:
+                return 0.0
+            wait = -self._tokens / self.rate
+            self.throttled += 1
+            self.total_wait += wait
+            return wait
+
+    def pause(self, seconds: float) -> None:
+        """Hold back every caller for at least `seconds`, e.g. after a `rate_limited` error."""
+        with self._lock:
+            self._refill(time.monotonic())
+            self._tokens = min(self._tokens, -seconds * self.rate)
+
+    def acquire(self, tokens: float = 1.0) -> float:
+        """Block until `tokens` are available. Return the time spent waiting."""
+        wait = self.reserve(tokens)
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+    async def acquire_async(self, tokens: float = 1.0) -> float:
+        """Asynchronous version of `acquire`."""
+        wait = self.reserve(tokens)
+        if wait > 0:
+            await asyncio.sleep(wait)
+        return wait
+
+    @property
+    def tokens(self) -> float:
+        """Tokens currently available. Negative when callers are queued."""
+        with self._lock:
+            self._refill(time.monotonic())
+            return self._tokens
+
+    @property
+    def wait_time(self) -> float:
+        """Seconds a new request would have to wait right now."""
+        tokens = self.tokens
+        return 0.0 if tokens >= 1 else (1 - tokens) / self.rate
+
+    def metrics(self) -> Dict[str, Any]:
+        """Return a snapshot of the bucket state and counters."""
+        return {
+            "rate": self.rate,
+            "capacity": self.capacity,
+            "tokens": self.tokens,
+            "wait_time": self.wait_time,
+            "acquired": self.acquired,
+            "throttled": self.throttled,
+            "total_wait": self.total_wait,
+        }
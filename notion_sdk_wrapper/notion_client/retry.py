@@ -0,0 +1,116 @@
+"""Retry policy for notion-sdk-py.
+
+Decides whether a failed request can be sent again and how long to wait before
+doing so. The policy is shared by the synchronous and asynchronous clients.
+"""
+import random
+from dataclasses import dataclass
+from email.utils import parsedate_to_datetime
+from datetime import datetime, timezone
+from typing import Optional, Tuple
+
+from .errors import APIErrorCode, APIResponseError, HTTPResponseError, RequestTimeoutError
+
+
+def is_idempotent(method: str, path: str) -> bool:
+    """Return whether sending the request twice has the same effect as sending it once.
+
+    Database queries and searches are read-only even though they use `POST`, and
+    `PATCH` updates set absolute values, except appending block children which
+    creates new blocks on every call.
+    """
+    method = method.upper()
+    if method in ("GET", "HEAD", "OPTIONS", "DELETE"):
+        return True
+    path = path.rstrip("/")
+    if method == "POST":
+        return path == "search" or path.endswith("/query")
+    if method == "PATCH":
+        return not path.endswith("/children")
+    return False
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Parse a `Retry-After` header given either in seconds or as an HTTP date."""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        date = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if date.tzinfo is None:
+        date = date.replace(tzinfo=timezone.utc)
+    return max(0.0, (date - datetime.now(timezone.utc)).total_seconds())
+
+
+@dataclass
+class RetryPolicy:
+    """Options to configure how failed requests are retried.
+
+    Attributes:
+        max_retries: Maximum number of retries for a single request.
+        backoff_base: Delay in seconds before the first retry when the response has no
+            `Retry-After` header. It doubles on every following attempt.
+        backoff_max: Upper bound in seconds for the exponential backoff.
+        jitter: Fraction of the backoff delay that is randomized, from 0 (no jitter)
+            to 1 ("full jitter").
+        retry_codes: API error codes worth retrying.
+        retry_statuses: HTTP statuses worth retrying when the body has no API error code.
+        retry_timeouts: Whether to retry requests that timed out.
+    """
+
+    max_retries: int = 5
+    backoff_base: float = 0.5
+    backoff_max: float = 30.0
+    jitter: float = 1.0
+    retry_codes: Tuple[str, ...] = (
+        APIErrorCode.RateLimited.value,
+        APIErrorCode.ServiceUnavailable.value,
+        APIErrorCode.InternalServerError.value,
+        APIErrorCode.ConflictError.value,
+    )
+    retry_statuses: Tuple[int, ...] = (429, 500, 502, 503, 504)
+    retry_timeouts: bool = True
+
+    def is_retryable(self, error: Exception, method: str, path: str) -> bool:
+        """Return whether `error` raised by `method path` can be retried."""
+        if isinstance(error, RequestTimeoutError):
+            return self.retry_timeouts and is_idempotent(method, path)
+        if isinstance(error, APIResponseError):
+            if error.code not in self.retry_codes:
+                return False
+        elif isinstance(error, HTTPResponseError):
+            if error.status not in self.retry_statuses:
+                return False
+        else:
+            return False
+        # A rate limited request was rejected before being processed, so it is
+        # always safe to send it again.
+        return is_rate_limited(error) or is_idempotent(method, path)
+
+    def backoff(self, attempt: int) -> float:
+        """Return the capped exponential backoff with jitter for the given attempt (0-based)."""
+        delay = min(self.backoff_max, self.backoff_base * 2 ** attempt)
+        return delay * (1 - self.jitter * random.random())
+
+    def get_delay(self, error: Exception, method: str, path: str, attempt: int) -> Optional[float]:
+        """Return how long to wait before retrying, or `None` if the request must not be retried."""
+        if attempt >= self.max_retries or not self.is_retryable(error, method, path):
+            return None
+        retry_after = None
+        if isinstance(error, HTTPResponseError):
+            retry_after = parse_retry_after(error.headers.get("Retry-After"))
+        if retry_after is not None:
+            return retry_after
+        return self.backoff(attempt)
+
+
+def is_rate_limited(error: Exception) -> bool:
+    """Return whether `error` is a rate limit response."""
+    if isinstance(error, APIResponseError):
+        return error.code == APIErrorCode.RateLimited
+    return isinstance(error, HTTPResponseError) and error.status == 429
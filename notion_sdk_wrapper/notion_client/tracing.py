@@ -0,0 +1,260 @@
+"""Optional tracing for notion-sdk-py.
+
+Tracing is disabled by default: `start_span` returns a shared no-op span and the
+`traced` decorator calls the wrapped function directly. Install a tracer with
+`set_tracer`, either `OpenTelemetryTracer` (requires `opentelemetry-api`) or
+`RecordingTracer`, which keeps the finished spans in memory.
+"""
+import functools
+import inspect
+import time
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, List, Optional
+
+
+class Span:
+    """No-op span, the interface of the spans returned by the tracers."""
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        """Set an attribute of the span."""
+
+    def add_event(self, name: str, attributes: Optional[Dict[str, Any]] = None) -> None:
+        """Record a timestamped event, such as a retry."""
+
+    def record_exception(self, exception: BaseException) -> None:
+        """Mark the span as failed with `exception`."""
+
+    def __enter__(self) -> "Span":
+        return self
+
+    def __exit__(self, exc_type: Any, exc_value: Any, traceback: Any) -> None:
+        if exc_value is not None:
+            self.record_exception(exc_value)
+
+
+NOOP_SPAN = Span()
+
+
+class Tracer:
+    """Base class of the tracers."""
+
+    def start_span(self, name: str, attributes: Optional[Dict[str, Any]] = None) -> Span:
+        """Return a span, started when entered as a context manager.
+
+        A span entered while another one is active becomes its child.
+        """
+        raise NotImplementedError
+
+
+class RecordedSpan(Span):
+    """Span kept by `RecordingTracer`.
+
+    Attributes:
+        name: Name of the operation.
+        parent: Span that was active when this one started, or `None`.
+        attributes: Attributes set on the span.
+        events: `(name, timestamp, attributes)` tuples.
+        error: Exception that ended the span, if any.
+        start: `time.perf_counter()` when the span was entered.
+        end: `time.perf_counter()` when the span was exited.
+    """
+
+    def __init__(
+        self, tracer: "RecordingTracer", name: str, attributes: Optional[Dict[str, Any]]
+    ) -> None:
+        self.tracer = tracer
+        self.name = name
+        self.parent: Optional[RecordedSpan] = None
+        self.attributes = dict(attributes or {})
+        self.events: List[Any] = []
+        self.error: Optional[BaseException] = None
+        self.start: Optional[float] = None
+        self.end: Optional[float] = None
+        self._token: Any = None
+
+    @property
+    def duration(self) -> Optional[float]:
+        """Seconds between the start and the end of the span."""
+        if self.start is None or self.end is None:
+            return None
+        return self.end - self.start
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+
+    def add_event(self, name: str, attributes: Optional[Dict[str, Any]] = None) -> None:
+        self.events.append((name, time.perf_counter(), dict(attributes or {})))
+
+    def record_exception(self, exception: BaseException) -> None:
+        self.error = exception
+
+    def __enter__(self) -> "RecordedSpan":
+        self.parent = self.tracer._current.get()
+        self._token = self.tracer._current.set(self)
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type: Any, exc_value: Any, traceback: Any) -> None:
+        self.end = time.perf_counter()
+        super().__exit__(exc_type, exc_value, traceback)
+        try:
+            self.tracer._current.reset(self._token)
+        except ValueError:
+            # A generator span closed from another context, e.g. by the garbage collector
+            pass
+        self.tracer.spans.append(self)
+
+    def __repr__(self) -> str:
+        return f"RecordedSpan({self.name!r}, duration={self.duration}, attributes={self.attributes})"
+
+
+class RecordingTracer(Tracer):
+    """Tracer keeping every finished span in `spans`, mostly for tests and debugging."""
+
+    def __init__(self) -> None:
+        self.spans: List[RecordedSpan] = []
+        self._current: ContextVar[Optional[RecordedSpan]] = ContextVar(
+            "notion_recorded_span", default=None
+        )
+
+    def start_span(
+        self, name: str, attributes: Optional[Dict[str, Any]] = None
+    ) -> RecordedSpan:
+        return RecordedSpan(self, name, attributes)
+
+
+class _OpenTelemetrySpan(Span):
+    def __init__(self, tracer: Any, name: str, attributes: Optional[Dict[str, Any]]) -> None:
+        self._manager = tracer.start_as_current_span(
+            name, attributes=attributes, record_exception=True, set_status_on_exception=True
+        )
+        self._span: Any = None
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        self._span.set_attribute(key, value)
+
+    def add_event(self, name: str, attributes: Optional[Dict[str, Any]] = None) -> None:
+        self._span.add_event(name, attributes=attributes)
+
+    def record_exception(self, exception: BaseException) -> None:
+        self._span.record_exception(exception)
+
+    def __enter__(self) -> "_OpenTelemetrySpan":
+        self._span = self._manager.__enter__()
+        return self
+
+    def __exit__(self, exc_type: Any, exc_value: Any, traceback: Any) -> None:
+        # OpenTelemetry records the exception itself
+        self._manager.__exit__(exc_type, exc_value, traceback)
+
+
+class OpenTelemetryTracer(Tracer):
+    """Tracer creating OpenTelemetry spans, with the OpenTelemetry context propagation.
+
+    Args:
+        tracer: An OpenTelemetry tracer. Defaults to the tracer named
+            `notion_sdk_wrapper` of the global tracer provider.
+    """
+
+    def __init__(self, tracer: Any = None) -> None:
+        if tracer is None:
+            from opentelemetry import trace
+
+            tracer = trace.get_tracer("notion_sdk_wrapper")
+        self.tracer = tracer
+
+    def start_span(self, name: str, attributes: Optional[Dict[str, Any]] = None) -> Span:
+        return _OpenTelemetrySpan(self.tracer, name, attributes)
+
+
+_tracer: Optional[Tracer] = None
+
+
+def set_tracer(tracer: Optional[Tracer]) -> None:
+    """Install `tracer` for every client, `None` disables tracing."""
+    global _tracer
+    _tracer = tracer
+
+
+def get_tracer() -> Optional[Tracer]:
+    return _tracer
+
+
+def is_tracing() -> bool:
+    return _tracer is not None
+
+
+def start_span(name: str, attributes: Optional[Dict[str, Any]] = None) -> Span:
+    """Return a span of the installed tracer, or the no-op span."""
+    tracer = _tracer
+    if tracer is None:
+        return NOOP_SPAN
+    return tracer.start_span(name, attributes)
+
+
+def _attributes(args: Any) -> Dict[str, Any]:
+    # Wrapper objects carry their ID, client methods take it as first argument
+    if args:
+        object_id = getattr(args[0], "block_id", None)
+        if object_id is None and len(args) > 1 and isinstance(args[1], str):
+            object_id = args[1]
+        if object_id is not None:
+            return {"notion.object_id": object_id}
+    return {}
+
+
+def traced(name: str) -> Callable[[Callable[..., Any]], Callable[..., Any]]:
+    """Decorate a wrapper operation to run it in a span named `name`.
+
+    Works on functions, coroutine functions and (async) generator functions, whose
+    span covers the whole iteration. When tracing is disabled the wrapped function
+    is called directly.
+    """
+
+    def decorator(func: Callable[..., Any]) -> Callable[..., Any]:
+        if inspect.isasyncgenfunction(func):
+
+            @functools.wraps(func)
+            async def async_generator_wrapper(*args: Any, **kwargs: Any) -> Any:
+                if _tracer is None:
+                    async for item in func(*args, **kwargs):
+                        yield item
+                    return
+                with start_span(name, _attributes(args)):
+                    async for item in func(*args, **kwargs):
+                        yield item
+
+            return async_generator_wrapper
+
+        if inspect.isgeneratorfunction(func):
+
+            @functools.wraps(func)
+            def generator_wrapper(*args: Any, **kwargs: Any) -> Any:
+                if _tracer is None:
+                    return (yield from func(*args, **kwargs))
+                with start_span(name, _attributes(args)):
+                    return (yield from func(*args, **kwargs))
+
+            return generator_wrapper
+
+        if inspect.iscoroutinefunction(func):
+
+            @functools.wraps(func)
+            async def coroutine_wrapper(*args: Any, **kwargs: Any) -> Any:
+                if _tracer is None:
+                    return await func(*args, **kwargs)
+                with start_span(name, _attributes(args)):
+                    return await func(*args, **kwargs)
+
+            return coroutine_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            if _tracer is None:
+                return func(*args, **kwargs)
+            with start_span(name, _attributes(args)):
+                return func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
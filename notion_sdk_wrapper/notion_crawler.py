@@ -0,0 +1,145 @@
+import asyncio
+from collections import deque, namedtuple
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Iterable, Optional
+
+from .concurrency import DEFAULT_CONCURRENCY, submit
+from .notion_async import AsyncDatabase, AsyncDatabaseBlock, AsyncPage, AsyncPageBlock
+from .notion_blocks import DatabaseBlock, Page, PageBlock
+from .notion_client.tracing import start_span
+from .notion_database import Database
+
+# `parent` is the object whose listing contained `object`, `depth` is 1 for the children of the root
+CrawlResult = namedtuple("CrawlResult", ["depth", "parent", "object"])
+
+
+class BaseCrawler(object):
+    """Breadth-first walk of a page tree, shared logic of `Crawler` and `AsyncCrawler`.
+
+    Child blocks, child pages and the rows of child databases are visited. Every object is
+    visited once, `max_depth` bounds the walk and `types` restricts which objects are yielded
+    (block types such as "paragraph" or "child_page", "page" for database rows and "database"),
+    without restricting the traversal.
+    """
+
+    _PAGE_TYPES = (Page, AsyncPage)
+    _DATABASE_TYPES = (Database, AsyncDatabase)
+    _DATABASE_BLOCK_TYPES = (DatabaseBlock, AsyncDatabaseBlock)
+    _PAGE_BLOCK_TYPES = (PageBlock, AsyncPageBlock)
+
+    def __init__(self, root, max_depth: Optional[int] = None, types: Optional[Iterable[str]] = None,
+                 max_workers: int = DEFAULT_CONCURRENCY, follow_databases: bool = True):
+        self.root = root
+        self.max_depth = max_depth
+        self.types = set(types) if types is not None else None
+        self.max_workers = max(1, max_workers)
+        self.follow_databases = follow_databases
+        # (object, exception) for every object whose children could not be listed
+        self.errors = []
+
+    def _object_type(self, obj):
+        if isinstance(obj, self._DATABASE_TYPES):
+            return "database"
+        if isinstance(obj, self._PAGE_TYPES) and obj._block_res is None:
+            return "page"
+        return (obj._block_res or {}).get("type")
+
+    def _match(self, obj):
+        return self.types is None or self._object_type(obj) in self.types
+
+    def _should_expand(self, obj, depth):
+        if self.max_depth is not None and depth >= self.max_depth:
+            return False
+        if isinstance(obj, self._DATABASE_TYPES + self._DATABASE_BLOCK_TYPES):
+            return self.follow_databases
+        if isinstance(obj, self._PAGE_TYPES + self._PAGE_BLOCK_TYPES):
+            return True
+        return bool((obj._block_res or {}).get("has_children"))
+
+    def _start(self):
+        # `max_depth=0` does not even list the children of the root
+        if self.max_depth is not None and self.max_depth <= 0:
+            return deque()
+        return deque([(self.root, 0)])
+
+    def _visit(self, parent, depth, children, visited, queue):
+        """Deduplicate `children`, queue the ones to expand and return the ones to yield."""
+        results = []
+        for child in children:
+            if child.block_id in visited:
+                continue
+            visited.add(child.block_id)
+            if self._match(child):
+                results.append(CrawlResult(depth, parent, child))
+            if self._should_expand(child, depth):
+                queue.append((child, depth))
+        return results
+
+
+class Crawler(BaseCrawler):
+    """Crawl with a bounded thread pool. Iterating yields `CrawlResult` as listings complete."""
+
+    def _expand(self, obj):
+        if isinstance(obj, Database):
+            return list(obj.iter_query())
+        if isinstance(obj, DatabaseBlock):
+            return list(obj.as_database().iter_query())
+        return list(obj.iter_children())
+
+    def __iter__(self):
+        with start_span("Crawler.crawl", {"notion.object_id": self.root.block_id}):
+            queue = self._start()
+            visited = {self.root.block_id}
+            executor = ThreadPoolExecutor(max_workers=self.max_workers)
+            running = {}
+            try:
+                while queue or running:
+                    while queue and len(running) < self.max_workers:
+                        obj, depth = queue.popleft()
+                        running[submit(executor, self._expand, obj)] = (obj, depth)
+                    done, _ = wait(running, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        obj, depth = running.pop(future)
+                        try:
+                            children = future.result()
+                        except Exception as e:
+                            self.errors.append((obj, e))
+                            continue
+                        yield from self._visit(obj, depth + 1, children, visited, queue)
+            finally:
+                executor.shutdown(wait=False, cancel_futures=True)
+
+
+class AsyncCrawler(BaseCrawler):
+    """Crawl with at most `max_workers` listings in flight. Use with `async for`."""
+
+    async def _expand(self, obj):
+        if isinstance(obj, AsyncDatabase):
+            return [page async for page in obj.iter_query()]
+        if isinstance(obj, AsyncDatabaseBlock):
+            return [page async for page in obj.as_database().iter_query()]
+        return [child async for child in obj.iter_children()]
+
+    async def __aiter__(self):
+        with start_span("AsyncCrawler.crawl", {"notion.object_id": self.root.block_id}):
+            queue = self._start()
+            visited = {self.root.block_id}
+            running = {}
+            try:
+                while queue or running:
+                    while queue and len(running) < self.max_workers:
+                        obj, depth = queue.popleft()
+                        running[asyncio.ensure_future(self._expand(obj))] = (obj, depth)
+                    done, _ = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+                    for task in done:
+                        obj, depth = running.pop(task)
+                        try:
+                            children = task.result()
+                        except Exception as e:
+                            self.errors.append((obj, e))
+                            continue
+                        for result in self._visit(obj, depth + 1, children, visited, queue):
+                            yield result
+            finally:
+                for task in running:
+                    task.cancel()
@@ -1,21 +1,50 @@
-import time
+import logging
+from pprint import pformat
+from typing import TYPE_CHECKING, Callable, Dict, Iterable
 
-from notion_client import Client
-from notion_blocks import *
-from rich_text import RichText
+from . import notion_export
+from .concurrency import DEFAULT_CONCURRENCY, prefetch_pages
+from .notion_bulk import BulkJob
+from .notion_blocks import Block, Page
+from .notion_client.helpers import iterate_paginated_api
+from .notion_client.tracing import traced
+from .notion_identity import wrap
+from .notion_filter import Filter, Sort, build_filter, build_sorts
+from .notion_replica import Replica
+from .notion_sync import Watermark, sync_pages
+from .rich_text import RichText
+
+if TYPE_CHECKING:
+    from .notion_client import Client
+
+logger = logging.getLogger(__name__)
 
 
 class Database(Block):
-    def __init__(self, client: Client, block_id: str, block_res=None):
+    def __init__(self, client: "Client", block_id: str, block_res=None):
         super(Database, self).__init__(client, block_id, block_res)
         self.database_id = block_id
         self._database_res = None
         self._properties = None
+        self._property_types = None
+
+    def _refresh(self, block_res=None, database_res=None):
+        super()._refresh(block_res)
+        if database_res is not None:
+            self._database_res = database_res
+            self._properties = None
+            self._property_types = None
+
+    def _known_last_edited_time(self):
+        return ((getattr(self, "_database_res", None) or {}).get("last_edited_time")
+                or super()._known_last_edited_time())
 
     @property
+    @traced("Database.database_res")
     def database_res(self):
         if getattr(self, "_database_res", None) is None:
-            self._database_res = self.client.databases.retrieve(self.database_id)
+            self._database_res = self.client.databases.retrieve(
+                self.database_id, last_edited_time=self._known_last_edited_time())
         return self._database_res
 
     @property
@@ -31,6 +60,20 @@ class Database(Block):
             self._properties = dict(zip(name_list, id_list))
         return self._properties
 
+    @property
+    def property_types(self):
+        if getattr(self, "_property_types", None) is None:
+            properties = self.database_res["properties"]
+            self._property_types = {name: properties[name]["type"] for name in properties}
+        return self._property_types
+
+    def _build_query(self, filter=None, sorts=None):
+        # The schema is only needed (and retrieved) to validate `Filter` / `Sort` objects
+        property_types = None
+        if isinstance(filter, Filter) or any(isinstance(sort, Sort) for sort in (sorts or [])):
+            property_types = self.property_types
+        return build_filter(filter, property_types), build_sorts(sorts, property_types)
+
     def __repr__(self):
         return "Database(" + pformat({
             "id": self.database_id,
@@ -38,27 +81,19 @@ class Database(Block):
             "properties": self.properties
         }) + ")"
 
-    # Note: query method has a limit of frequency of calls to Notion API
-    # So, we will retry it if we get a 429 error
-    def query(self, filters: Dict = None, start_cursor: str = None):
+    # Rate limiting and retries on 429 errors are handled by the client
+    # `filter` and `sorts` accept either `Filter` / `Sort` objects or raw API payloads,
+    # `filters` is kept as an alias of `filter` for backward compatibility
+    @traced("Database.query")
+    def query(self, filter=None, start_cursor: str = None, sorts=None, page_size: int = 100, filters=None):
+        filter, sorts = self._build_query(filter if filter is not None else filters, sorts)
         data = {
-            "filters": filters,
+            "filter": filter,
+            "sorts": sorts,
             "start_cursor": start_cursor,
-            "page_size": 100
+            "page_size": page_size
         }
-
-        def retry():
-            try:
-                return self.client.databases.query(self.database_id, **data)
-            except Exception as e:
-                if str(e).startswith("429"):
-                    print("Retrying query...")
-                    time.sleep(1)
-                    return retry()
-                else:
-                    raise e
-
-        res = retry()
+        res = self.client.databases.query(self.database_id, **data)
 
         results = res["results"]
         has_more = res["has_more"]
@@ -66,28 +101,96 @@ class Database(Block):
 
         return results, has_more, next_cursor
 
-    def query_all(self, filters=None):
-        if filters is None:
-            filters = {}
+    @traced("Database.query_all")
+    def query_all(self, filter=None, sorts=None, filters=None):
+        filter, sorts = self._build_query(filter if filter is not None else filters, sorts)
 
         results = []
         has_more = True
         start_cursor = None
         while has_more:
-            cur_res, has_more, start_cursor = self.query(filters, start_cursor)
+            cur_res, has_more, start_cursor = self.query(filter, start_cursor, sorts)
             results.extend(cur_res)
-            print("Got {} results".format(len(results)))
+            logger.debug("Got %d results", len(results))
         return results
 
-    def children(self, filters=None):
+    def _iter_query_res(self, filter=None, sorts=None, page_size: int = 100):
+        filter, sorts = self._build_query(filter, sorts)
+
+        def fetch(start_cursor):
+            return self.client.databases.query(self.database_id, filter=filter, sorts=sorts,
+                                               start_cursor=start_cursor, page_size=page_size)
+
+        for res in prefetch_pages(fetch):
+            yield from res["results"]
+
+    @traced("Database.iter_query")
+    def iter_query(self, filter=None, sorts=None, page_size: int = 100):
+        """Yield a `Page` for every row as soon as its result page arrives.
+
+        The next result page is prefetched in the background while the current one is consumed,
+        and nothing is accumulated, so memory stays flat on large databases.
+        """
+        for page_res in self._iter_query_res(filter, sorts, page_size):
+            yield wrap(Page, self.client, page_res["id"], page_res=page_res)
+
+    # The export methods decode the property values straight from the query results, without building
+    # `Page` objects or retrieving properties one by one
+    def to_records(self, filter=None, sorts=None, fetch_truncated: bool = False):
+        """Yield one dict `{"id": ..., property name: value}` per row.
+
+        Title, text, relation and people values with 25 items or more may be truncated in the query
+        results: a warning is logged, or with `fetch_truncated=True` they are read from the property
+        endpoint, one request per value.
+        """
+        return notion_export.to_records(self._iter_query_res(filter, sorts), self.property_types,
+                                        self._fetch_property if fetch_truncated else None)
+
+    @traced("Database.to_columns")
+    def to_columns(self, filter=None, sorts=None, fetch_truncated: bool = False) -> Dict[str, list]:
+        """Return `{property name: column}` for the rows, see `notion_export.to_columns` and `to_records`."""
+        return notion_export.to_columns(self._iter_query_res(filter, sorts), self.property_types,
+                                        self._fetch_property if fetch_truncated else None)
+
+    @traced("Database.to_csv")
+    def to_csv(self, f, filter=None, sorts=None, fetch_truncated: bool = False) -> int:
+        """Stream the rows as CSV to `f`, a file object or a path. Returns the number of rows."""
+        if isinstance(f, str):
+            with open(f, "w", newline="", encoding="utf-8") as file:
+                return self.to_csv(file, filter, sorts, fetch_truncated)
+        return notion_export.write_csv(f, self._iter_query_res(filter, sorts), self.property_types,
+                                       self._fetch_property if fetch_truncated else None)
+
+    @traced("Database.to_parquet")
+    def to_parquet(self, path: str, filter=None, sorts=None, row_group_size: int = 10000,
+                   fetch_truncated: bool = False) -> int:
+        """Stream the rows to a Parquet file (requires `pyarrow`). Returns the number of rows."""
+        return notion_export.write_parquet(path, self._iter_query_res(filter, sorts), self.property_types,
+                                           row_group_size=row_group_size,
+                                           fetch=self._fetch_property if fetch_truncated else None)
+
+    def _fetch_property(self, page_id: str, res: Dict) -> Dict:
+        # Complete version of a paginated property of a query result, from the property endpoint
+        property_type = res["type"]
+        items = iterate_paginated_api(self.client.pages.properties.retrieve, page_id=page_id,
+                                      property_id=res["id"])
+        return dict(res, **{property_type: [item[property_type] for item in items]})
+
+    @traced("Database.children")
+    def children(self, filter=None, sorts=None, filters=None):
+        filter = filter if filter is not None else filters
+        # Only the unfiltered, unsorted listing is cached
+        if filter or sorts:
+            return [wrap(Page, self.client, res["id"], page_res=res) for res in self.query_all(filter, sorts)]
         if getattr(self, "_children", None) is None:
-            _children_res = self.query_all(filters)
+            _children_res = self.query_all()
             self._children = []
             for children_page_res in _children_res:
                 children_page_id = children_page_res["id"]
-                self._children.append(Page(self.client, block_id=children_page_id, page_res=children_page_res))
+                self._children.append(wrap(Page, self.client, children_page_id, page_res=children_page_res))
         return self._children
 
+    @traced("Database.add_page")
     def add_page(self, properties: Dict):
         data = {
             "parent": {
@@ -96,4 +199,55 @@ class Database(Block):
             "properties": properties
         }
         res = self.client.pages.create(**data)
-        return Page(self.client, block_id=res["id"], page_res=res)
+        return wrap(Page, self.client, res["id"], page_res=res)
+
+    def add_pages(self, rows: Iterable[Dict], max_workers: int = DEFAULT_CONCURRENCY, checkpoint=None,
+                  key: Callable[[Dict], str] = None, on_progress=None) -> BulkJob:
+        """Create one page per properties dict in `rows` with a bounded pool of workers.
+
+        Iterate over the returned `BulkJob` to run it and stream the created `Page` objects; failed rows
+        end up in `job.failures`. With `checkpoint` (a file path), completed rows are recorded and skipped
+        when the job is run again. Rows are identified by their index unless `key(row)` is given.
+        """
+        if key is None:
+            items = ((index, row) for index, row in enumerate(rows))
+        else:
+            items = ((key(row), row) for row in rows)
+        return BulkJob(self.add_page, items, max_workers=max_workers, checkpoint=checkpoint,
+                       on_progress=on_progress)
+
+    def update_pages(self, updates: Dict[str, Dict], max_workers: int = DEFAULT_CONCURRENCY, checkpoint=None,
+                     on_progress=None) -> BulkJob:
+        """Update the properties of many pages, given as `{page_id: properties}`. See `add_pages`."""
+        def update(item):
+            page_id, properties = item
+            res = self.client.pages.update(page_id=page_id, properties=properties)
+            page = wrap(Page, self.client, page_id, page_res=res)
+            page._invalidate_others()
+            return page
+
+        items = ((page_id, (page_id, properties)) for page_id, properties in updates.items())
+        return BulkJob(update, items, max_workers=max_workers, checkpoint=checkpoint, on_progress=on_progress)
+
+    def flush_pages(self, pages: Iterable[Page], max_workers: int = DEFAULT_CONCURRENCY, checkpoint=None,
+                    on_progress=None) -> BulkJob:
+        """Send the staged property updates of many pages concurrently. See `add_pages`."""
+        items = ((page.page_id, page) for page in pages if page.staged_properties)
+        return BulkJob(Page.flush, items, max_workers=max_workers, checkpoint=checkpoint, on_progress=on_progress)
+
+    def sync(self, since: str = None, watermark=None, page_size: int = 100):
+        """Yield only the pages edited since the previous sync, oldest first.
+
+        `watermark` is a `Watermark` or the path of the file persisting it between runs; `since`
+        (an ISO 8601 timestamp) overrides the stored watermark as the lower bound.
+        """
+        if not isinstance(watermark, Watermark):
+            watermark = Watermark(watermark)
+        return sync_pages(self, watermark, since=since, page_size=page_size)
+
+    @traced("Database.replicate")
+    def replicate(self, path: str = ":memory:", table: str = "pages") -> Replica:
+        """Return a local SQLite `Replica` of the database at `path`, brought up to date."""
+        replica = Replica(self, path, table=table)
+        replica.refresh()
+        return replica
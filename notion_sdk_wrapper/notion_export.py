@@ -0,0 +1,171 @@
+import csv
+import logging
+import math
+from array import array
+from typing import Callable, Dict, Iterable, List, Optional
+
+from .notion_property import decode_property_value, is_truncated
+
+logger = logging.getLogger(__name__)
+
+# Property types decoded into a typed `array` column, with the value used for empty cells
+_ARRAY_TYPES = {
+    "number": ("d", math.nan),
+    "checkbox": ("b", 0),
+}
+
+
+def _new_column(property_type: str):
+    if property_type in _ARRAY_TYPES:
+        return array(_ARRAY_TYPES[property_type][0])
+    return []
+
+
+# Property types whose values query results cut to 25 items
+_LIST_TYPES = {"title", "rich_text", "relation", "people"}
+
+# `fetch(page_id, res)` returns the complete version of the property `res` of a page
+FetchProperty = Callable[[str, Dict], Dict]
+
+
+class _Decoder(object):
+    """Decode the properties of query results, completing or counting the truncated values."""
+
+    def __init__(self, property_types: Dict[str, str], fetch: Optional[FetchProperty] = None):
+        self.names = list(property_types)
+        self.checked = [name for name, property_type in property_types.items() if property_type in _LIST_TYPES]
+        self.fetch = fetch
+        self.truncated = 0
+
+    def decode(self, page_res: Dict) -> Dict:
+        properties = page_res["properties"]
+        values = {}
+        for name in self.names:
+            res = properties.get(name)
+            values[name] = decode_property_value(res) if res is not None else None
+        for name in self.checked:
+            res = properties.get(name)
+            if res is None or not is_truncated(res):
+                continue
+            if self.fetch is None:
+                self.truncated += 1
+            else:
+                values[name] = decode_property_value(self.fetch(page_res["id"], res))
+        return values
+
+    def warn(self):
+        if self.truncated:
+            logger.warning("%d exported values have 25 items or more and may be truncated, export with "
+                           "fetch_truncated=True to read them from the property endpoint", self.truncated)
+
+
+def to_records(pages_res: Iterable[Dict], property_types: Dict[str, str], fetch: Optional[FetchProperty] = None):
+    """Yield one dict `{"id": ..., property name: value}` per page, decoded from the query results.
+
+    Query results hold at most 25 items of title, text, relation and people values. Longer values are
+    completed with `fetch` if given, otherwise a warning counting them is logged once every page is read.
+    """
+    decoder = _Decoder(property_types, fetch)
+    for page_res in pages_res:
+        record = {"id": page_res["id"]}
+        record.update(decoder.decode(page_res))
+        yield record
+    decoder.warn()
+
+
+def to_columns(pages_res: Iterable[Dict], property_types: Dict[str, str],
+               fetch: Optional[FetchProperty] = None) -> Dict[str, List]:
+    """Decode query results into one column per property in a single pass.
+
+    Number and checkbox properties become `array("d")` / `array("b")` columns, with NaN / 0 for empty
+    cells, which support the buffer protocol (`numpy.frombuffer(column)` does not copy). Other properties
+    become lists of `str`, lists (multi-valued properties) or None. Truncated values are handled as in
+    `to_records`.
+    """
+    decoder = _Decoder(property_types, fetch)
+    columns = {"id": []}
+    for name, property_type in property_types.items():
+        columns[name] = _new_column(property_type)
+    for page_res in pages_res:
+        columns["id"].append(page_res["id"])
+        values = decoder.decode(page_res)
+        for name, property_type in property_types.items():
+            value = values[name]
+            if value is None and property_type in _ARRAY_TYPES:
+                value = _ARRAY_TYPES[property_type][1]
+            columns[name].append(value)
+    decoder.warn()
+    return columns
+
+
+def _csv_value(value):
+    if value is None:
+        return ""
+    if isinstance(value, list):
+        return ", ".join(str(item) for item in value)
+    return value
+
+
+def write_csv(f, pages_res: Iterable[Dict], property_types: Dict[str, str],
+              fetch: Optional[FetchProperty] = None) -> int:
+    """Stream query results as CSV rows to the file object `f` and return the number of rows written.
+
+    Multi-valued properties are joined with ", ". Truncated values are handled as in `to_records`.
+    """
+    writer = csv.writer(f)
+    names = list(property_types)
+    writer.writerow(["id"] + names)
+    count = 0
+    for record in to_records(pages_res, property_types, fetch):
+        writer.writerow([record["id"]] + [_csv_value(record[name]) for name in names])
+        count += 1
+    return count
+
+
+def _arrow_schema(pa, property_types: Dict[str, str]):
+    arrow_types = {
+        "number": pa.float64(),
+        "checkbox": pa.bool_(),
+        "multi_select": pa.list_(pa.string()),
+        "people": pa.list_(pa.string()),
+        "relation": pa.list_(pa.string()),
+        "files": pa.list_(pa.string()),
+    }
+    fields = [pa.field("id", pa.string())]
+    for name, property_type in property_types.items():
+        fields.append(pa.field(name, arrow_types.get(property_type, pa.string())))
+    return pa.schema(fields)
+
+
+def write_parquet(path: str, pages_res: Iterable[Dict], property_types: Dict[str, str],
+                  row_group_size: int = 10000, fetch: Optional[FetchProperty] = None) -> int:
+    """Stream query results to a Parquet file, one row group per `row_group_size` rows.
+
+    Requires `pyarrow`. Returns the number of rows written. Truncated values are handled as in
+    `to_records`.
+    """
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise ImportError("write_parquet requires pyarrow, install it with `pip install pyarrow`")
+
+    schema = _arrow_schema(pa, property_types)
+    count = 0
+    with pq.ParquetWriter(path, schema) as writer:
+        batch = []
+        for record in to_records(pages_res, property_types, fetch):
+            # Formula / rollup values of other types are written as text
+            for field in schema:
+                value = record[field.name]
+                if field.type == pa.string() and value is not None and not isinstance(value, str):
+                    record[field.name] = str(value)
+            batch.append(record)
+            if len(batch) >= row_group_size:
+                writer.write_table(pa.Table.from_pylist(batch, schema=schema))
+                count += len(batch)
+                batch = []
+        if batch:
+            writer.write_table(pa.Table.from_pylist(batch, schema=schema))
+            count += len(batch)
+    return count
@@ -0,0 +1,198 @@
+from pprint import pformat
+from typing import Dict, List, Optional
+
+_TEXT_CONDITIONS = {"equals", "does_not_equal", "contains", "does_not_contain", "starts_with", "ends_with",
+                    "is_empty", "is_not_empty"}
+_NUMBER_CONDITIONS = {"equals", "does_not_equal", "greater_than", "less_than", "greater_than_or_equal_to",
+                      "less_than_or_equal_to", "is_empty", "is_not_empty"}
+_DATE_CONDITIONS = {"equals", "before", "after", "on_or_before", "on_or_after", "past_week", "past_month",
+                    "past_year", "this_week", "next_week", "next_month", "next_year", "is_empty", "is_not_empty"}
+_CONTAINS_CONDITIONS = {"contains", "does_not_contain", "is_empty", "is_not_empty"}
+_SELECT_CONDITIONS = {"equals", "does_not_equal", "is_empty", "is_not_empty"}
+
+# Filter conditions accepted by the Notion API for each property type.
+# Types missing from this table (formula, rollup) take nested conditions and are not validated.
+_PROPERTY_CONDITIONS = {
+    "title": _TEXT_CONDITIONS,
+    "rich_text": _TEXT_CONDITIONS,
+    "url": _TEXT_CONDITIONS,
+    "email": _TEXT_CONDITIONS,
+    "phone_number": _TEXT_CONDITIONS,
+    "number": _NUMBER_CONDITIONS,
+    "unique_id": _NUMBER_CONDITIONS - {"is_empty", "is_not_empty"},
+    "checkbox": {"equals", "does_not_equal"},
+    "select": _SELECT_CONDITIONS,
+    "status": _SELECT_CONDITIONS,
+    "multi_select": _CONTAINS_CONDITIONS,
+    "people": _CONTAINS_CONDITIONS,
+    "created_by": _CONTAINS_CONDITIONS,
+    "last_edited_by": _CONTAINS_CONDITIONS,
+    "relation": _CONTAINS_CONDITIONS,
+    "files": {"is_empty", "is_not_empty"},
+    "date": _DATE_CONDITIONS,
+    "created_time": _DATE_CONDITIONS,
+    "last_edited_time": _DATE_CONDITIONS,
+}
+
+_TIMESTAMPS = {"created_time", "last_edited_time"}
+
+# The API accepts compound filters nested at most two levels deep
+_MAX_DEPTH = 2
+
+
+class Filter:
+    """Base class of the database query filters.
+
+    Filters can be combined with `&` and `|`, and are turned into the API payload by `build`,
+    which validates them against the property types of the database.
+    """
+
+    def build(self, property_types: Optional[Dict[str, str]] = None) -> Dict:
+        raise NotImplementedError
+
+    def depth(self) -> int:
+        return 0
+
+    def __and__(self, other: "Filter"):
+        return CompoundFilter("and", [self, other])
+
+    def __or__(self, other: "Filter"):
+        return CompoundFilter("or", [self, other])
+
+
+def _validate_condition(type: str, condition: str):
+    conditions = _PROPERTY_CONDITIONS.get(type)
+    if conditions is not None and condition not in conditions:
+        raise ValueError("Condition {} is not supported by {} properties, available conditions are {}".format(
+            condition, type, sorted(conditions)))
+
+
+class PropertyFilter(Filter):
+    """Filter on a database property, e.g. `PropertyFilter("Tags", "contains", "urgent")`.
+
+    The property type is looked up in the database schema when the filter is built, unless it is
+    given explicitly with `type`. Conditions such as `is_empty` default to `value=True`.
+    """
+
+    def __init__(self, name: str, condition: str, value=True, type: str = None):
+        self.name = name
+        self.condition = condition
+        self.value = value
+        self.type = type
+
+    def build(self, property_types: Optional[Dict[str, str]] = None) -> Dict:
+        type = self.type
+        if type is None and property_types is not None:
+            if self.name not in property_types:
+                raise ValueError("Property {} not found, available names are {}".format(
+                    self.name, list(property_types.keys())))
+            type = property_types[self.name]
+        if type is None:
+            raise ValueError("Type of property {} is unknown, pass it with `type=`".format(self.name))
+        _validate_condition(type, self.condition)
+        return {
+            "property": self.name,
+            type: {self.condition: self.value}
+        }
+
+    def __repr__(self):
+        return "PropertyFilter(" + pformat({"name": self.name, self.condition: self.value}) + ")"
+
+
+class TimestampFilter(Filter):
+    """Filter on the `created_time` or `last_edited_time` of the pages, without a matching property."""
+
+    def __init__(self, timestamp: str, condition: str, value=True):
+        if timestamp not in _TIMESTAMPS:
+            raise ValueError("Timestamp must be one of {}".format(sorted(_TIMESTAMPS)))
+        _validate_condition(timestamp, condition)
+        self.timestamp = timestamp
+        self.condition = condition
+        self.value = value
+
+    def build(self, property_types: Optional[Dict[str, str]] = None) -> Dict:
+        return {
+            "timestamp": self.timestamp,
+            self.timestamp: {self.condition: self.value}
+        }
+
+    def __repr__(self):
+        return "TimestampFilter(" + pformat({"timestamp": self.timestamp, self.condition: self.value}) + ")"
+
+
+class CompoundFilter(Filter):
+    """`and` / `or` combination of filters. Nested combinations with the same operator are flattened."""
+
+    def __init__(self, operator: str, filters: List[Filter]):
+        if operator not in ("and", "or"):
+            raise ValueError("Operator must be 'and' or 'or'")
+        self.operator = operator
+        self.filters = []
+        for filter in filters:
+            if isinstance(filter, CompoundFilter) and filter.operator == operator:
+                self.filters.extend(filter.filters)
+            else:
+                self.filters.append(filter)
+
+    def depth(self) -> int:
+        return 1 + max((filter.depth() for filter in self.filters), default=0)
+
+    def build(self, property_types: Optional[Dict[str, str]] = None) -> Dict:
+        if self.depth() > _MAX_DEPTH:
+            raise ValueError("Compound filters can only be nested {} levels deep".format(_MAX_DEPTH))
+        return {
+            self.operator: [filter.build(property_types) for filter in self.filters]
+        }
+
+    def __repr__(self):
+        return "CompoundFilter(" + pformat({self.operator: self.filters}) + ")"
+
+
+def And(*filters: Filter) -> CompoundFilter:
+    return CompoundFilter("and", list(filters))
+
+
+def Or(*filters: Filter) -> CompoundFilter:
+    return CompoundFilter("or", list(filters))
+
+
+class Sort:
+    """Sort criterion on a property or on a timestamp (`created_time` / `last_edited_time`)."""
+
+    def __init__(self, property: str = None, direction: str = "ascending", timestamp: str = None):
+        if (property is None) == (timestamp is None):
+            raise ValueError("Exactly one of property and timestamp must be given")
+        if timestamp is not None and timestamp not in _TIMESTAMPS:
+            raise ValueError("Timestamp must be one of {}".format(sorted(_TIMESTAMPS)))
+        if direction not in ("ascending", "descending"):
+            raise ValueError("Direction must be 'ascending' or 'descending'")
+        self.property = property
+        self.timestamp = timestamp
+        self.direction = direction
+
+    def build(self, property_types: Optional[Dict[str, str]] = None) -> Dict:
+        if self.property is not None:
+            if property_types is not None and self.property not in property_types:
+                raise ValueError("Property {} not found, available names are {}".format(
+                    self.property, list(property_types.keys())))
+            return {"property": self.property, "direction": self.direction}
+        return {"timestamp": self.timestamp, "direction": self.direction}
+
+    def __repr__(self):
+        return "Sort(" + pformat(self.build()) + ")"
+
+
+def build_filter(filter, property_types: Optional[Dict[str, str]] = None) -> Optional[Dict]:
+    """Turn a `Filter` (or an already built dict) into a query payload. Empty filters become `None`."""
+    if isinstance(filter, Filter):
+        return filter.build(property_types)
+    return filter or None
+
+
+def build_sorts(sorts, property_types: Optional[Dict[str, str]] = None) -> Optional[List[Dict]]:
+    """Turn a list of `Sort` (or already built dicts) into a query payload."""
+    if not sorts:
+        return None
+    if isinstance(sorts, (Sort, dict)):
+        sorts = [sorts]
+    return [sort.build(property_types) if isinstance(sort, Sort) else sort for sort in sorts]
@@ -0,0 +1,108 @@
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Optional
+
+
+def normalize_id(object_id: str) -> str:
+    """Return `object_id` in the dashed form used by the API responses, or as is if it is not a UUID."""
+    try:
+        return str(uuid.UUID(object_id))
+    except ValueError:
+        return object_id
+
+
+class IdentityMap(object):
+    """LRU map from object ID to the wrapper object already built for it.
+
+    Objects are keyed by `(class, id)`, IDs with or without dashes being the same, so a `Page` and the `PageBlock` of the same ID are distinct entries.
+    At most `max_size` objects are kept, least recently used first out, and an entry older than `ttl`
+    seconds is dropped on access so long-running jobs eventually see fresh data.
+    """
+
+    def __init__(self, max_size: int = 10000, ttl: Optional[float] = 60.0):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._objects = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, cls, object_id: str):
+        key = (cls, normalize_id(object_id))
+        with self._lock:
+            entry = self._objects.get(key)
+            if entry is not None and self.ttl is not None and time.monotonic() - entry[1] > self.ttl:
+                del self._objects[key]
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._objects.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, obj):
+        with self._lock:
+            key = (type(obj), normalize_id(obj.block_id))
+            self._objects[key] = (obj, time.monotonic())
+            self._objects.move_to_end(key)
+            while len(self._objects) > self.max_size:
+                self._objects.popitem(last=False)
+
+    def invalidate(self, object_id: str, keep=None):
+        """Drop every object built for `object_id`, except `keep`."""
+        object_id = normalize_id(object_id)
+        with self._lock:
+            for key in [key for key in self._objects if key[1] == object_id]:
+                if self._objects[key][0] is not keep:
+                    del self._objects[key]
+
+    def clear(self):
+        with self._lock:
+            self._objects.clear()
+
+    def __len__(self):
+        return len(self._objects)
+
+    def __repr__(self):
+        return "IdentityMap(size={}, max_size={}, ttl={})".format(len(self), self.max_size, self.ttl)
+
+
+# Identity maps are stored on the low-level clients, which are what the wrapper objects hold: the map and its
+# objects are collected together with the client, the objects referencing it back only make a cycle
+
+
+def get_identity_map(client) -> Optional[IdentityMap]:
+    return getattr(client, "_identity_map", None)
+
+
+def set_identity_map(client, identity_map: Optional[IdentityMap]):
+    client._identity_map = identity_map
+
+
+def wrap(cls, client, object_id: str, **res):
+    """Return the `cls` object for `object_id`, reusing the one in the client identity map if any.
+
+    Responses given in `res` (`block_res`, `page_res`) are fresh from the network, so they replace the
+    ones held by a reused object.
+    """
+    object_id = normalize_id(object_id)
+    identity_map = get_identity_map(client)
+    if identity_map is None:
+        return cls(client, object_id, **res)
+    obj = identity_map.get(cls, object_id)
+    if obj is None:
+        obj = cls(client, object_id, **res)
+        identity_map.put(obj)
+    else:
+        obj._refresh(**res)
+    return obj
+
+
+def invalidate(client, object_id: str, keep=None):
+    """Drop the other objects built for `object_id` after `keep` received a new response."""
+    identity_map = get_identity_map(client)
+    if identity_map is not None:
+        identity_map.invalidate(object_id, keep=keep)
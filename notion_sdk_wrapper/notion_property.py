@@ -1,6 +1,6 @@
 from pprint import pformat
-from typing import Dict, List
-from rich_text import RichText
+from typing import Callable, Dict, List
+from .rich_text import RichText
 
 
 def guess_property_type(res: Dict):
@@ -19,23 +19,133 @@ def guess_property_type(res: Dict):
         return BaseProperty
 
 
+# Property types the property endpoint returns as a paginated list of property items. Page objects
+# hold at most 25 items of them, and rollups computed over more than 25 relations are not reliable
+PAGINATED_PROPERTY_TYPES = {"title", "rich_text", "relation", "people", "rollup"}
+PAGE_PROPERTY_LIMIT = 25
+
+
+def is_truncated(res: Dict) -> bool:
+    """Whether a property found in `page_res["properties"]` may be missing values."""
+    property_type = res["type"]
+    if property_type == "rollup":
+        return True
+    if property_type in PAGINATED_PROPERTY_TYPES:
+        return res.get("has_more", False) or len(res.get(property_type) or []) >= PAGE_PROPERTY_LIMIT
+    return False
+
+
+def property_from_page(res: Dict):
+    """Build the property object of a property found in `page_res["properties"]`.
+
+    The result is the same as from the property endpoint: paginated types become a `PropertyItem`.
+    """
+    property_type = res["type"]
+    if property_type in PAGINATED_PROPERTY_TYPES:
+        res = {
+            "object": "list",
+            "type": "property_item",
+            "results": [{"object": "property_item", "id": res["id"], "type": property_type, property_type: item}
+                        for item in res.get(property_type) or []],
+            "property_item": {"id": res["id"], "type": property_type, property_type: {}},
+            "has_more": False,
+            "next_cursor": None,
+        }
+    return guess_property_type(res)(res)
+
+
+def _plain_text(value):
+    if isinstance(value, dict):
+        value = [value]
+    return RichText(value).plain_text
+
+
+def decode_property_value(res: Dict):
+    """Return the plain Python value of a property as found in `page_res["properties"]`.
+
+    Text becomes `str`, select options their name, people and relations their IDs, dates their start,
+    and multi-valued properties a list. Unknown types are returned as is.
+    """
+    property_type = res["type"]
+    value = res.get(property_type)
+    if value is None:
+        return None
+    if property_type in ("title", "rich_text"):
+        return _plain_text(value)
+    if property_type in ("select", "status"):
+        return value["name"]
+    if property_type == "multi_select":
+        return [option["name"] for option in value]
+    if property_type == "date":
+        return value["start"]
+    if property_type in ("people", "relation"):
+        return [item["id"] for item in value]
+    if property_type in ("created_by", "last_edited_by"):
+        return value["id"]
+    if property_type == "files":
+        return [file["name"] for file in value]
+    if property_type == "unique_id":
+        return value["number"] if not value.get("prefix") else "{}-{}".format(value["prefix"], value["number"])
+    if property_type in ("formula", "rollup"):
+        # Nested value of the formula / rollup result type, e.g. {"type": "number", "number": 3}
+        if value["type"] == "array":
+            return [decode_property_value(item) for item in value["array"]]
+        return decode_property_value(value)
+    return value
+
+
 class BaseProperty:
     def __init__(self, res: Dict):
         self.res = res
 
 
 class PropertyItem(BaseProperty):
-    def __init__(self, res: Dict):
+    """Value of a paginated property (title, rich text, relation, people, rollup) as a list of properties.
+
+    With `fetch`, a function from a cursor to the next response, the pages after the first one are only
+    fetched when iteration or indexing reaches them; `len` and `load` fetch them all.
+    """
+
+    def __init__(self, res: Dict, fetch: Callable[[str], Dict] = None):
         super().__init__(res)
         self.subs = []
+        self._fetch = fetch
+        self._add_page(res)
+
+    def _add_page(self, res: Dict):
         for sub in res["results"]:
             property_type = guess_property_type(sub)
             self.subs.append(property_type(sub))
+        self.has_more = bool(res.get("has_more")) and self._fetch is not None
+        self.next_cursor = res.get("next_cursor")
+
+    def _fetch_until(self, index: int = None):
+        while self.has_more and (index is None or index >= len(self.subs)):
+            self._add_page(self._fetch(self.next_cursor))
+
+    def load(self):
+        """Fetch the remaining pages, return self."""
+        self._fetch_until()
+        return self
+
+    def __iter__(self):
+        index = 0
+        while True:
+            self._fetch_until(index)
+            if index >= len(self.subs):
+                return
+            yield self.subs[index]
+            index += 1
 
     def __getitem__(self, item):
+        if isinstance(item, slice) or item < 0:
+            self._fetch_until()
+        else:
+            self._fetch_until(item)
         return self.subs[item]
 
     def __len__(self):
+        self._fetch_until()
         return len(self.subs)
 
     def __repr__(self):
@@ -66,7 +176,8 @@ class TitleProperty(BaseProperty):
 
     @property
     def plain_text(self):
-        return RichText([self.res["title"]]).plain_text
+        # A single rich text object in property items, a list of them in page objects
+        return _plain_text(self.res["title"])
 
     def __repr__(self):
         return "TitleProperty(" + pformat({"plain_text": self.plain_text}) + ")"
@@ -85,7 +196,7 @@ class RichTextProperty(BaseProperty):
 
     @property
     def plain_text(self):
-        return RichText([self.res["rich_text"]]).plain_text
+        return _plain_text(self.res["rich_text"])
 
     def __repr__(self):
         return "RichTextProperty(" + pformat({"plain_text": self.plain_text}) + ")"
@@ -0,0 +1,171 @@
+import json
+import sqlite3
+import threading
+from typing import Dict, List, Sequence
+
+from .notion_property import decode_property_value
+from .notion_sync import Watermark
+
+# SQLite column types of the property types, everything else is stored as TEXT
+_COLUMN_TYPES = {
+    "number": "REAL",
+    "checkbox": "INTEGER",
+}
+
+# Property types decoded to a list, stored as a JSON array
+_LIST_TYPES = {"multi_select", "people", "relation", "files"}
+
+_SYSTEM_COLUMNS = ("id", "last_edited_time", "created_time", "url")
+
+
+def _quote(name: str) -> str:
+    return '"' + name.replace('"', '""') + '"'
+
+
+def _encode(value):
+    if isinstance(value, (list, dict)):
+        return json.dumps(value, ensure_ascii=False)
+    return value
+
+
+class Replica(object):
+    """Local SQLite copy of a database, with one column per property, for fast repeated local queries.
+
+    `refresh` only fetches the pages edited since the previous refresh (see `Database.sync`), and the sync
+    watermark is stored in the same SQLite file, so a replica on disk stays current across runs at the cost
+    of one query per refresh. Pages deleted in Notion are only dropped by `rebuild`, since incremental
+    queries cannot see them.
+    """
+
+    def __init__(self, database, path: str = ":memory:", table: str = "pages", overlap: float = 120.0):
+        self.database = database
+        self.path = path
+        self.table = table
+        self.overlap = overlap
+        self._lock = threading.RLock()
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._connection.row_factory = sqlite3.Row
+        self._columns: Dict[str, str] = {}
+        with self._lock, self._connection:
+            self._connection.execute("CREATE TABLE IF NOT EXISTS replica_state (key TEXT PRIMARY KEY, value TEXT)")
+            self._connection.execute("CREATE TABLE IF NOT EXISTS {} ({} TEXT PRIMARY KEY, {} TEXT, {} TEXT, {} TEXT)"
+                                     .format(_quote(table), *map(_quote, _SYSTEM_COLUMNS)))
+            row = self._connection.execute("SELECT value FROM replica_state WHERE key = ?", (table,)).fetchone()
+        self._state = json.loads(row[0]) if row is not None else {}
+        self._columns = self._state.get("columns", {})
+
+    def _watermark(self) -> Watermark:
+        watermark = Watermark(overlap=self.overlap)
+        watermark.value = self._state.get("watermark")
+        watermark.seen = self._state.get("seen", {})
+        return watermark
+
+    def _save_state(self, watermark: Watermark):
+        self._state = {"watermark": watermark.value, "seen": watermark.seen, "columns": self._columns}
+        self._connection.execute("INSERT OR REPLACE INTO replica_state VALUES (?, ?)",
+                                 (self.table, json.dumps(self._state)))
+
+    def _update_schema(self) -> bool:
+        # New properties get a new column; columns of removed properties are kept
+        added = False
+        for name, property_type in self.database.property_types.items():
+            # SQLite column names are case insensitive, a property named like a system column is left out
+            if name in self._columns or name.lower() in _SYSTEM_COLUMNS:
+                continue
+            self._connection.execute("ALTER TABLE {} ADD COLUMN {} {}".format(
+                _quote(self.table), _quote(name), _COLUMN_TYPES.get(property_type, "TEXT")))
+            self._columns[name] = property_type
+            added = True
+        return added
+
+    def _row(self, page_res: Dict) -> List:
+        properties = page_res.get("properties", {})
+        row = [page_res["id"], page_res.get("last_edited_time"), page_res.get("created_time"), page_res.get("url")]
+        for name in self._columns:
+            row.append(_encode(decode_property_value(properties[name])) if name in properties else None)
+        return row
+
+    def _upsert(self, pages_res: Sequence[Dict]):
+        columns = list(_SYSTEM_COLUMNS) + list(self._columns)
+        self._connection.executemany("INSERT OR REPLACE INTO {} ({}) VALUES ({})".format(
+            _quote(self.table), ", ".join(map(_quote, columns)), ", ".join("?" * len(columns))),
+            [self._row(page_res) for page_res in pages_res])
+
+    def refresh(self, batch_size: int = 500) -> int:
+        """Fetch the pages edited since the last refresh into the replica and return how many were written.
+
+        Rows are committed every `batch_size` pages together with the watermark, so an interrupted refresh
+        keeps its progress. When properties were added to the database, every page is read again.
+        """
+        with self._lock:
+            with self._connection:
+                if self._update_schema():
+                    # Rows already replicated have no value for the new columns, read every page again
+                    self._state = {"columns": self._columns}
+            watermark = self._watermark()
+            count = 0
+            batch = []
+            for page in self.database.sync(watermark=watermark):
+                batch.append(page.page_res)
+                if len(batch) >= batch_size:
+                    count += self._commit(batch, watermark)
+                    batch = []
+            count += self._commit(batch, watermark)
+            return count
+
+    def _commit(self, batch: List[Dict], watermark: Watermark) -> int:
+        with self._connection:
+            if batch:
+                self._upsert(batch)
+            # `sync` advances the watermark past a page only once the next one is requested, so the last
+            # page of `batch` may be written again by the next refresh, but never skipped
+            self._save_state(watermark)
+        return len(batch)
+
+    def rebuild(self) -> int:
+        """Reload every page from scratch, dropping the rows of pages deleted or archived in Notion."""
+        with self._lock:
+            with self._connection:
+                self._connection.execute("DELETE FROM {}".format(_quote(self.table)))
+                self._state = {"columns": self._columns}
+            return self.refresh()
+
+    def execute(self, sql: str, parameters: Sequence = ()) -> List[sqlite3.Row]:
+        """Run any SQL statement on the replica, e.g. an aggregation, and return the rows."""
+        with self._lock:
+            return self._connection.execute(sql, parameters).fetchall()
+
+    def select(self, where: str = None, parameters: Sequence = (), order_by: str = None,
+               limit: int = None) -> List[Dict]:
+        """Return the matching rows as dicts keyed by property name, multi-valued properties as lists.
+
+        `where` and `order_by` are SQL fragments, property columns are named after the properties
+        (quote names with spaces: `'"Due date" < ?'`).
+        """
+        sql = "SELECT * FROM {}".format(_quote(self.table))
+        if where:
+            sql += " WHERE " + where
+        if order_by:
+            sql += " ORDER BY " + order_by
+        if limit is not None:
+            sql += " LIMIT {:d}".format(limit)
+        rows = []
+        for row in self.execute(sql, parameters):
+            row = dict(row)
+            for name, property_type in self._columns.items():
+                if property_type in _LIST_TYPES and row.get(name) is not None:
+                    row[name] = json.loads(row[name])
+                elif property_type == "checkbox" and row.get(name) is not None:
+                    row[name] = bool(row[name])
+            rows.append(row)
+        return rows
+
+    def __len__(self):
+        return self.execute("SELECT COUNT(*) FROM {}".format(_quote(self.table)))[0][0]
+
+    def close(self):
+        with self._lock:
+            self._connection.close()
+
+    def __repr__(self):
+        return "Replica(database={}, path={}, rows={})".format(self.database.database_id, self.path, len(self))
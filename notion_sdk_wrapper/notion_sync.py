@@ -0,0 +1,108 @@
+import json
+import os
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Optional
+
+from .notion_filter import Sort, TimestampFilter
+
+
+def parse_time(value: str) -> datetime:
+    """Parse an ISO 8601 timestamp as returned by the Notion API."""
+    return datetime.fromisoformat(value.replace("Z", "+00:00"))
+
+
+def format_time(value: datetime) -> str:
+    return value.astimezone(timezone.utc).isoformat(timespec="milliseconds").replace("+00:00", "Z")
+
+
+class Watermark(object):
+    """High-watermark of an incremental sync, persisted as a small JSON file.
+
+    Besides the latest `last_edited_time` seen, the IDs of the pages edited within the overlap window
+    before it are remembered with their `last_edited_time`: the next sync re-reads that window (Notion
+    rounds `last_edited_time` to the minute and clocks drift) and skips the pages it already saw.
+    """
+
+    def __init__(self, path: Optional[str] = None, overlap: float = 120.0):
+        self.path = path
+        self.overlap = timedelta(seconds=overlap)
+        self.value: Optional[str] = None
+        self.seen: Dict[str, str] = {}
+        if path is not None and os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                state = json.load(f)
+            self.value = state.get("watermark")
+            self.seen = state.get("seen", {})
+
+    @property
+    def query_since(self) -> Optional[str]:
+        """Lower bound to query from: the watermark minus the overlap window."""
+        if self.value is None:
+            return None
+        return format_time(parse_time(self.value) - self.overlap)
+
+    def is_new(self, page_res: Dict) -> bool:
+        return self.seen.get(page_res["id"]) != page_res["last_edited_time"]
+
+    def advance(self, page_res: Dict):
+        last_edited_time = page_res["last_edited_time"]
+        self.seen[page_res["id"]] = last_edited_time
+        if self.value is None or parse_time(last_edited_time) > parse_time(self.value):
+            self.value = last_edited_time
+
+    def save(self):
+        if self.value is not None:
+            # Only the pages inside the next overlap window are needed to deduplicate
+            since = parse_time(self.value) - self.overlap
+            self.seen = {page_id: edited for page_id, edited in self.seen.items() if parse_time(edited) >= since}
+        if self.path is None:
+            return
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"watermark": self.value, "seen": self.seen}, f)
+        os.replace(tmp_path, self.path)
+
+    def __repr__(self):
+        return "Watermark(" + repr(self.value) + ")"
+
+
+def _sync_query(watermark: Watermark, since: Optional[str]):
+    since = since or watermark.query_since
+    filter = TimestampFilter("last_edited_time", "on_or_after", since) if since is not None else None
+    sorts = [Sort(timestamp="last_edited_time", direction="ascending")]
+    return filter, sorts
+
+
+def sync_pages(database, watermark: Watermark, since: Optional[str] = None, page_size: int = 100):
+    """Yield the pages of `database` edited since the watermark, oldest first.
+
+    A page only advances the watermark once the consumer is done with it, and the watermark is saved
+    after every result page and when iteration stops, so an interrupted sync resumes where it stopped.
+    """
+    filter, sorts = _sync_query(watermark, since)
+    try:
+        for count, page in enumerate(database.iter_query(filter=filter, sorts=sorts, page_size=page_size), 1):
+            if watermark.is_new(page.page_res):
+                yield page
+            watermark.advance(page.page_res)
+            if count % page_size == 0:
+                watermark.save()
+    finally:
+        watermark.save()
+
+
+async def async_sync_pages(database, watermark: Watermark, since: Optional[str] = None, page_size: int = 100):
+    """Asynchronous version of `sync_pages`."""
+    filter, sorts = _sync_query(watermark, since)
+    try:
+        count = 0
+        async for page in database.iter_query(filter=filter, sorts=sorts, page_size=page_size):
+            page_res = await page.page_res
+            if watermark.is_new(page_res):
+                yield page
+            watermark.advance(page_res)
+            count += 1
+            if count % page_size == 0:
+                watermark.save()
+    finally:
+        watermark.save()
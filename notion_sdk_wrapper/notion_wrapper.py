@@ -1,25 +1,154 @@
-from notion_blocks import Page, Block
-from notion_client import Client
-from notion_database import Database
-from notion_property import *
+from typing import List
+
+from .concurrency import DEFAULT_CONCURRENCY, gather_concurrently, map_concurrently
+from .notion_async import AsyncBlock, AsyncDatabase, AsyncPage
+from .notion_blocks import Page, Block
+from .notion_client import AsyncClient, Client
+from .notion_client.helpers import get_id
+from .notion_client.tracing import traced
+from .notion_crawler import AsyncCrawler, Crawler
+from .notion_database import Database
+from .notion_identity import IdentityMap, set_identity_map, wrap
+from .notion_property import NumberProperty, RichTextProperty
+
+
+def parse_object_id(object_id: str) -> str:
+    """Accept either a raw object ID or a notion.so URL and return the object ID."""
+    if object_id.startswith(("http://", "https://")):
+        return get_id(object_id)
+    return object_id
 
 
 class NotionClient:
-    def __init__(self, NOTION_TOKEN: str):
-        self.client = Client(auth=NOTION_TOKEN)
+    def __init__(self, NOTION_TOKEN: str, identity_map_size: int = 10000, identity_map_ttl: float = 60.0,
+                 **kwargs):
+        # Extra keyword arguments are `ClientOptions` fields, e.g. `rate_limit=3.0`
+        self.client = Client(auth=NOTION_TOKEN, **kwargs)
+        # The same ID gives back the same (already loaded) object for `identity_map_ttl` seconds,
+        # `identity_map_size=0` disables it
+        self.identity_map = IdentityMap(identity_map_size, identity_map_ttl) if identity_map_size else None
+        set_identity_map(self.client, self.identity_map)
 
     def retrieve_page(self, page_id: str):
-        page = Page(self.client, page_id)
+        page = wrap(Page, self.client, parse_object_id(page_id))
         return page
 
     def retrieve_database(self, database_id: str):
-        database = Database(self.client, database_id)
+        database = wrap(Database, self.client, parse_object_id(database_id))
         return database
 
+    @traced("NotionClient.retrieve_block")
     def retrieve_block(self, block_id: str):
+        block_id = parse_object_id(block_id)
         res = self.client.blocks.retrieve(block_id)
         block_type = Block.guess_block_type(res)
-        return block_type(self.client, block_id=block_id, block_res=res)
+        return wrap(block_type, self.client, block_id, block_res=res)
+
+    @traced("NotionClient.retrieve_pages")
+    def retrieve_pages(self, page_ids: List[str], max_workers: int = DEFAULT_CONCURRENCY) -> List:
+        """Retrieve many pages concurrently and return hydrated `Page` objects in input order.
+
+        A page that could not be retrieved is returned as the raised exception.
+        """
+        def retrieve(page_id):
+            page = self.retrieve_page(page_id)
+            page.page_res
+            return page
+
+        return map_concurrently(retrieve, page_ids, max_workers)
+
+    @traced("NotionClient.retrieve_blocks")
+    def retrieve_blocks(self, block_ids: List[str], max_workers: int = DEFAULT_CONCURRENCY) -> List:
+        """Retrieve many blocks concurrently, see `retrieve_pages`."""
+        return map_concurrently(self.retrieve_block, block_ids, max_workers)
+
+    @traced("NotionClient.retrieve_databases")
+    def retrieve_databases(self, database_ids: List[str], max_workers: int = DEFAULT_CONCURRENCY) -> List:
+        """Retrieve many databases concurrently, see `retrieve_pages`."""
+        def retrieve(database_id):
+            database = self.retrieve_database(database_id)
+            database.database_res
+            return database
+
+        return map_concurrently(retrieve, database_ids, max_workers)
+
+    def crawl(self, root_id: str, max_depth: int = None, types: List[str] = None,
+              max_workers: int = DEFAULT_CONCURRENCY, follow_databases: bool = True) -> Crawler:
+        """Walk the tree under a page, block or database breadth-first with a bounded thread pool.
+
+        Iterate over the returned `Crawler` to stream `CrawlResult(depth, parent, object)` tuples;
+        objects whose children could not be listed are collected in `crawler.errors`.
+        """
+        root = self.retrieve_block(root_id)
+        return Crawler(root, max_depth=max_depth, types=types, max_workers=max_workers,
+                       follow_databases=follow_databases)
+
+
+class AsyncNotionClient:
+    def __init__(self, NOTION_TOKEN: str, identity_map_size: int = 10000, identity_map_ttl: float = 60.0,
+                 **kwargs):
+        self.client = AsyncClient(auth=NOTION_TOKEN, **kwargs)
+        self.identity_map = IdentityMap(identity_map_size, identity_map_ttl) if identity_map_size else None
+        set_identity_map(self.client, self.identity_map)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        await self.aclose()
+
+    async def aclose(self):
+        await self.client.aclose()
+
+    def retrieve_page(self, page_id: str):
+        page = wrap(AsyncPage, self.client, parse_object_id(page_id))
+        return page
+
+    def retrieve_database(self, database_id: str):
+        database = wrap(AsyncDatabase, self.client, parse_object_id(database_id))
+        return database
+
+    @traced("AsyncNotionClient.retrieve_block")
+    async def retrieve_block(self, block_id: str):
+        block_id = parse_object_id(block_id)
+        res = await self.client.blocks.retrieve(block_id)
+        block_type = AsyncBlock.guess_block_type(res)
+        return wrap(block_type, self.client, block_id, block_res=res)
+
+    @traced("AsyncNotionClient.retrieve_pages")
+    async def retrieve_pages(self, page_ids: List[str], max_concurrency: int = DEFAULT_CONCURRENCY) -> List:
+        """Retrieve many pages concurrently and return hydrated `AsyncPage` objects in input order.
+
+        A page that could not be retrieved is returned as the raised exception.
+        """
+        async def retrieve(page_id):
+            page = self.retrieve_page(page_id)
+            await page.page_res
+            return page
+
+        return await gather_concurrently(retrieve, page_ids, max_concurrency)
+
+    @traced("AsyncNotionClient.retrieve_blocks")
+    async def retrieve_blocks(self, block_ids: List[str], max_concurrency: int = DEFAULT_CONCURRENCY) -> List:
+        """Retrieve many blocks concurrently, see `retrieve_pages`."""
+        return await gather_concurrently(self.retrieve_block, block_ids, max_concurrency)
+
+    @traced("AsyncNotionClient.retrieve_databases")
+    async def retrieve_databases(self, database_ids: List[str], max_concurrency: int = DEFAULT_CONCURRENCY) -> List:
+        """Retrieve many databases concurrently, see `retrieve_pages`."""
+        async def retrieve(database_id):
+            database = self.retrieve_database(database_id)
+            await database.database_res
+            return database
+
+        return await gather_concurrently(retrieve, database_ids, max_concurrency)
+
+    async def crawl(self, root_id: str, max_depth: int = None, types: List[str] = None,
+                    max_concurrency: int = DEFAULT_CONCURRENCY, follow_databases: bool = True) -> AsyncCrawler:
+        """Asynchronous version of `NotionClient.crawl`, iterate over the result with `async for`."""
+        root = await self.retrieve_block(root_id)
+        return AsyncCrawler(root, max_depth=max_depth, types=types, max_workers=max_concurrency,
+                            follow_databases=follow_databases)
 
 
 if __name__ == "__main__":
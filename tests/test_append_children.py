@@ -0,0 +1,133 @@
+"""Appending nested block trees beyond the limits of a single append request.
+
+    python -m unittest discover tests
+"""
+import asyncio
+import json
+import os
+import sys
+import unittest
+import uuid
+
+import httpx
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from notion_sdk_wrapper.notion_async import AsyncBlock  # noqa: E402
+from notion_sdk_wrapper.notion_blocks import Block, TextBlock  # noqa: E402
+from notion_sdk_wrapper.notion_client import AsyncClient, Client  # noqa: E402
+
+
+def _nested(template):
+    return template[template["type"]].get("children") or []
+
+
+def _label(template):
+    return template[template["type"]]["rich_text"][0]["text"]["content"]
+
+
+def _tree(label, children=()):
+    return TextBlock.template(type="toggle", text=label, children=list(children) or None)
+
+
+class FakeChildrenEndpoint:
+    """Append and list block children, rejecting requests over the API limits like the API does."""
+
+    def __init__(self):
+        self.children = {}
+        self.requests = 0
+
+    def _store(self, parent_id, templates):
+        created = []
+        for template in templates:
+            block_id = str(uuid.uuid4())
+            content = {key: value for key, value in template[template["type"]].items() if key != "children"}
+            block = {"object": "block", "id": block_id, "type": template["type"], template["type"]: content,
+                     "has_children": bool(_nested(template))}
+            self.children.setdefault(parent_id, []).append(block)
+            self._store(block_id, _nested(template))
+            created.append(block)
+        return created
+
+    def _error(self, templates, depth=0):
+        if len(templates) > 100:
+            return "more than 100 children"
+        for template in templates:
+            if _nested(template) and depth == 2:
+                return "more than two levels of nesting"
+            error = _nested(template) and self._error(_nested(template), depth + 1)
+            if error:
+                return error
+        return None
+
+    def _count(self, templates):
+        return sum(1 + self._count(_nested(template)) for template in templates)
+
+    def handle(self, request):
+        parent_id = request.url.path.split("/")[3]
+        if request.method == "GET":
+            return httpx.Response(200, json={"object": "list", "results": self.children.get(parent_id, []),
+                                             "has_more": False, "next_cursor": None})
+        self.requests += 1
+        templates = json.loads(request.content)["children"]
+        error = self._error(templates) or (self._count(templates) > 1000 and "more than 1000 blocks")
+        if error:
+            return httpx.Response(400, json={"object": "error", "status": 400, "code": "validation_error",
+                                             "message": error})
+        return httpx.Response(200, json={"object": "list", "results": self._store(parent_id, templates),
+                                         "has_more": False, "next_cursor": None})
+
+    def labels(self, parent_id):
+        return [(_label(block), self.labels(block["id"])) for block in self.children.get(parent_id, [])]
+
+
+def _labels(templates):
+    return [(_label(template), _labels(_nested(template))) for template in templates]
+
+
+# A toggle with 150 children, the first of them with 120 children (more than 100 grandchildren), and a
+# branch five levels deep
+TEMPLATES = [
+    _tree("root", [_tree("child 0", [_tree("grandchild {}".format(i)) for i in range(120)])]
+          + [_tree("child {}".format(i)) for i in range(1, 150)]),
+    _tree("deep", [_tree("1", [_tree("2", [_tree("3", [_tree("4", [_tree("5")])])])])]),
+    _tree("leaf"),
+]
+
+
+class AppendChildrenTest(unittest.TestCase):
+    def setUp(self):
+        self.endpoint = FakeChildrenEndpoint()
+        self.parent_id = str(uuid.uuid4())
+
+    def test_nested_children_beyond_the_limits(self):
+        client = Client(client=httpx.Client(transport=httpx.MockTransport(self.endpoint.handle)),
+                        rate_limit=None, retry=None)
+        appended = Block(client, self.parent_id).append_children(children=TEMPLATES)
+
+        self.assertEqual([_label(block.block_res) for block in appended], ["root", "deep", "leaf"])
+        self.assertEqual(self.endpoint.labels(self.parent_id), _labels(TEMPLATES))
+
+    def test_nested_children_beyond_the_limits_async(self):
+        async def append():
+            client = AsyncClient(client=httpx.AsyncClient(transport=httpx.MockTransport(self.endpoint.handle)),
+                                 rate_limit=None, retry=None)
+            return await AsyncBlock(client, self.parent_id).append_children(children=TEMPLATES)
+
+        appended = asyncio.run(append())
+
+        self.assertEqual(len(appended), 3)
+        self.assertEqual(self.endpoint.labels(self.parent_id), _labels(TEMPLATES))
+
+    def test_small_trees_are_sent_in_one_request(self):
+        client = Client(client=httpx.Client(transport=httpx.MockTransport(self.endpoint.handle)),
+                        rate_limit=None, retry=None)
+        templates = [_tree("toggle {}".format(i), [_tree("child", [_tree("grandchild")])]) for i in range(10)]
+        Block(client, self.parent_id).append_children(children=templates)
+
+        self.assertEqual(self.endpoint.requests, 1)
+        self.assertEqual(self.endpoint.labels(self.parent_id), _labels(templates))
+
+
+if __name__ == "__main__":
+    unittest.main()